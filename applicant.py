@@ -0,0 +1,94 @@
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, and_
+from sqlalchemy.orm import Session
+
+from database import SSNRecord, Bureau, KYC, DrivingLicense
+from schemas import SSNResponse, BureauResponse, KYCResponse, DrivingLicenseResponse
+
+# Section name in the composite response -> (model, response schema)
+APPLICANT_SECTIONS = {
+    "ssn_record": (SSNRecord, SSNResponse),
+    "bureau": (Bureau, BureauResponse),
+    "kyc": (KYC, KYCResponse),
+    "driving_license": (DrivingLicense, DrivingLicenseResponse),
+}
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """Turn ``"bureau.dti,kyc,ssn_record.first_name"`` into ``{section: [columns] or None}``"""
+    if not fields:
+        return None
+    projection = {}
+    for item in filter(None, (part.strip() for part in fields.split(","))):
+        section, _, column = item.partition(".")
+        if section not in APPLICANT_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown section: {section}")
+        model = APPLICANT_SECTIONS[section][0]
+        if not column:
+            projection[section] = None
+            continue
+        if column not in model.__table__.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {item}")
+        if projection.get(section, []) is not None:
+            projection.setdefault(section, []).append(column)
+    return projection
+
+def load_applicant_profile(db: Session, ssn: str, license_number: Optional[str] = None,
+                           fields: Optional[str] = None) -> dict:
+    """Load the SSN record, bureau, KYC and driving license of one applicant in a single joined query.
+
+    The driving license is matched by ``license_number`` when given, otherwise
+    by the name and address on the SSN record.
+    """
+    projection = parse_fields(fields)
+
+    columns = []
+    for section, (model, _) in APPLICANT_SECTIONS.items():
+        if projection is not None and section not in projection:
+            continue
+        names = [c.name for c in model.__table__.columns]
+        if projection is not None and projection[section] is not None:
+            # The id tells an unmatched outer join apart from a row with empty fields
+            names = ["id"] + [name for name in projection[section] if name != "id"]
+        columns += [getattr(model, name).label(f"{section}__{name}") for name in names]
+    # The SSN record id is always selected so a missing applicant can be detected
+    columns.append(SSNRecord.id.label("applicant__id"))
+
+    if license_number:
+        license_match = DrivingLicense.license_number == license_number
+    else:
+        license_match = and_(DrivingLicense.first_name == SSNRecord.first_name,
+                             DrivingLicense.last_name == SSNRecord.last_name,
+                             DrivingLicense.address == SSNRecord.address)
+
+    query = (
+        select(*columns)
+        .select_from(SSNRecord)
+        .outerjoin(Bureau, Bureau.ssn == SSNRecord.ssn)
+        .outerjoin(KYC, KYC.ssn == SSNRecord.ssn)
+        .outerjoin(DrivingLicense, license_match)
+        .where(SSNRecord.ssn == ssn)
+        .order_by(DrivingLicense.created_at.desc())
+        .limit(1)
+    )
+    row = db.execute(query).mappings().first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+
+    profile = {"ssn": ssn}
+    for section, (_, schema) in APPLICANT_SECTIONS.items():
+        if projection is not None and section not in projection:
+            continue
+        prefix = f"{section}__"
+        values = {key[len(prefix):]: value for key, value in row.items() if key.startswith(prefix)}
+        if values.get("id") is None:
+            profile[section] = None
+        elif projection is None or projection[section] is None:
+            profile[section] = schema.model_validate(values).model_dump()
+        else:
+            profile[section] = {key: str(value) if isinstance(value, Decimal) else value
+                                for key, value in values.items()}
+    return profile
@@ -0,0 +1,256 @@
+"""End-to-end load test of the API against local stand-ins for every upstream.
+
+Starts stub OpenAI, Cloudinary, Langflow and scoring servers plus the app
+itself under uvicorn, drives a weighted mix of uploads, lookups and flow
+runs over real HTTP, and reports throughput and p50/p95/p99 latency per
+scenario. No external service is contacted and no credits are spent.
+
+    python benchmarks/e2e.py --requests 400 --concurrency 16 --llm-latency 0.8
+    python benchmarks/e2e.py --mix upload_pdf=1,lookup_ssn=4 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+from common import make_pdf, percentile, prepare_environment
+
+import httpx
+import uvicorn
+
+SSN = "854659582"
+
+DEFAULT_MIX = {
+    "upload_pdf": 2,
+    "upload_image": 1,
+    "upload_bank": 1,
+    "lookup_ssn": 4,
+    "lookup_bureau": 2,
+    "applicant": 2,
+    "latest_ssn": 2,
+    "run_flow": 1,
+    "uw_result": 1,
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app, port):
+    """Run ``app`` under uvicorn on a background thread and wait until it accepts connections"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"server on port {port} failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def make_png(width=64, height=40, seed=0):
+    """Build a small RGB PNG with pseudo-random pixels"""
+    rng = random.Random(seed)
+    rows = b"".join(b"\x00" + bytes(rng.randrange(256) for _ in range(width * 3)) for _ in range(height))
+
+    def chunk(tag, body):
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def build_request(scenario, n, unique_documents):
+    """Return ``(method, url, kwargs)`` for the ``n``-th request of ``scenario``"""
+    marker = n if unique_documents else 0
+    if scenario == "upload_pdf":
+        ssn = f"{101 + marker % 500:03d}-{marker % 99 + 1:02d}-{marker % 9999 + 1:04d}"
+        pdf = make_pdf([f"SOCIAL SECURITY ADMINISTRATION\nSocial Security Number {ssn}\nJOHN DOE"])
+        return "POST", "/upload_personal_documents", {
+            "params": {"document_type": "ssn"},
+            "files": {"file": (f"ssn-{marker}.pdf", pdf, "application/pdf")},
+        }
+    if scenario == "upload_image":
+        return "POST", "/upload_personal_documents", {
+            "params": {"document_type": "driving_license"},
+            "files": {"file": (f"license-{marker}.png", make_png(seed=marker), "image/png")},
+        }
+    if scenario == "upload_bank":
+        lines = "\n".join(f"2024-01-{day:02d} PAYROLL DEPOSIT {1000 + marker + day}.00" for day in range(1, 29))
+        pdf = make_pdf([f"FIRST NATIONAL BANK\nAccount Statement\n{lines}"])
+        return "POST", "/upload_bank_documents", {
+            "params": {"application_type": "bank_statement"},
+            "files": {"file": (f"statement-{marker}.pdf", pdf, "application/pdf")},
+        }
+    if scenario == "lookup_ssn":
+        return "GET", f"/ssn/{SSN}", {}
+    if scenario == "lookup_bureau":
+        return "GET", f"/bureau-record/{SSN}", {}
+    if scenario == "applicant":
+        return "GET", f"/applicant/{SSN}", {}
+    if scenario == "latest_ssn":
+        return "GET", "/latest_ssn_number", {}
+    if scenario == "run_flow":
+        return "GET", "/run_underwriting_flow", {}
+    if scenario == "uw_result":
+        return "GET", f"/get_uw_result/377/case-{n}", {}
+    raise ValueError(scenario)
+
+
+async def drive(base_url, mix, total, concurrency, unique_documents, seed):
+    rng = random.Random(seed)
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[name] for name in names], k=total)
+    queue = asyncio.Queue()
+    for n, scenario in enumerate(plan):
+        queue.put_nowait((n, scenario))
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    async def worker(client):
+        while not queue.empty():
+            n, scenario = queue.get_nowait()
+            method, url, kwargs = build_request(scenario, n, unique_documents)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[scenario].append(time.perf_counter() - start)
+            if failed:
+                errors[scenario] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, errors
+
+
+def summarise(elapsed, latencies, errors):
+    rows = []
+    for scenario in sorted(latencies):
+        samples = latencies[scenario]
+        rows.append({
+            "scenario": scenario,
+            "requests": len(samples),
+            "errors": errors[scenario],
+            "req_per_s": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        })
+    everything = [sample for samples in latencies.values() for sample in samples]
+    rows.append({
+        "scenario": "TOTAL",
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "req_per_s": len(everything) / elapsed,
+        "p50_ms": percentile(everything, 50) * 1000,
+        "p95_ms": percentile(everything, 95) * 1000,
+        "p99_ms": percentile(everything, 99) * 1000,
+    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="comma separated scenario=weight pairs, e.g. upload_pdf=2,lookup_ssn=5")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--cloudinary-latency", type=float, default=0.3)
+    parser.add_argument("--cloudinary-error-rate", type=float, default=0.0)
+    parser.add_argument("--flow-latency", type=float, default=1.0)
+    parser.add_argument("--flow-error-rate", type=float, default=0.0)
+    parser.add_argument("--scoring-ready-after", type=float, default=1.0)
+    parser.add_argument("--scoring-error-rate", type=float, default=0.0)
+    parser.add_argument("--image-delivery", choices=["inline", "cloudinary"], default="inline",
+                        help="send images to the LLM inline or via a Cloudinary upload (IMAGE_DELIVERY_MODE)")
+    parser.add_argument("--cloudinary-archive", action="store_true",
+                        help="archive inline images to Cloudinary in the background (CLOUDINARY_ARCHIVE)")
+    parser.add_argument("--repeat-documents", action="store_true",
+                        help="upload identical documents so the LLM result cache can answer repeats")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    ports = {name: free_port() for name in ("openai", "cloudinary", "langflow", "scoring", "app")}
+
+    # The app reads upstream locations at import time, so point it at the stubs first
+    prepare_environment()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{ports['openai']}/v1"
+    os.environ["LANGLFLOW_URL"] = f"http://127.0.0.1:{ports['langflow']}/api/v1/run/bench-flow"
+    os.environ["UW_API_BASE_URL"] = f"http://127.0.0.1:{ports['scoring']}"
+    os.environ["IMAGE_DELIVERY_MODE"] = args.image_delivery
+    os.environ["CLOUDINARY_ARCHIVE"] = str(args.cloudinary_archive).lower()
+    os.environ.setdefault("UW_POLL_INITIAL_DELAY", "0.2")
+    os.environ.setdefault("UW_POLL_INTERVAL", "0.25")
+
+    import cloudinary
+    import main as app_main
+    from stub_upstreams import create_cloudinary_stub, create_langflow_stub, create_openai_stub, create_scoring_stub
+
+    cloudinary.config(upload_prefix=f"http://127.0.0.1:{ports['cloudinary']}")
+
+    stubs = {
+        "openai": create_openai_stub(args.llm_latency, args.llm_error_rate, args.seed),
+        "cloudinary": create_cloudinary_stub(args.cloudinary_latency, args.cloudinary_error_rate, args.seed),
+        "langflow": create_langflow_stub(args.flow_latency, args.flow_error_rate, args.seed),
+        "scoring": create_scoring_stub(args.scoring_ready_after, 0.02, args.scoring_error_rate, args.seed),
+    }
+    servers = [serve(stub, ports[name]) for name, stub in stubs.items()]
+    servers.append(serve(app_main.app, ports["app"]))
+
+    try:
+        print(f"driving {args.requests} requests at concurrency {args.concurrency}...")
+        elapsed, latencies, errors = asyncio.run(drive(
+            f"http://127.0.0.1:{ports['app']}", args.mix, args.requests, args.concurrency,
+            not args.repeat_documents, args.seed,
+        ))
+    finally:
+        for server, thread in reversed(servers):
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    rows = summarise(elapsed, latencies, errors)
+    print(f"\n{'scenario':<14}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        print(f"{row['scenario']:<14}{row['requests']:>9}{row['errors']:>8}{row['req_per_s']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    print(f"\nwall time {elapsed:.2f}s, upstream calls: openai={stubs['openai'].state.calls} "
+          f"cloudinary={stubs['cloudinary'].state.uploads} scoring={stubs['scoring'].state.calls}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"elapsed_s": elapsed, "config": {k: v for k, v in vars(args).items() if k != "json"},
+                       "results": rows}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
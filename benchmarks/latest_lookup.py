@@ -0,0 +1,100 @@
+"""Latency of the latest-* lookups as the upload tables grow.
+
+Fills ``document_upload`` and ``application_upload`` in a scratch SQLite
+database in steps and times the queries behind ``/latest_ssn_number`` and
+``/latest_bank_statement`` with and without the composite
+``(type, created_at)`` indexes. With the indexes the lookup time stays flat.
+
+    python benchmarks/latest_lookup.py --rows 10000 100000 1000000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from common import prepare_environment
+
+prepare_environment()
+
+from sqlalchemy import insert, text
+from database import engine, SessionLocal, DocumentUploadSave, ApplicationUploadSave
+from migrations import ensure_indexes
+
+DOCUMENT_TYPES = ["driving_license", "ssn"]
+APPLICATION_TYPES = ["bank_application", "bank_statement"]
+
+
+def fill(start, stop, chunk=20000):
+    rng = random.Random(start)
+    base = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(start, stop, chunk):
+            n = min(chunk, stop - offset)
+            conn.execute(insert(DocumentUploadSave), [{
+                "id": str(uuid.uuid4()),
+                "document_type": rng.choice(DOCUMENT_TYPES),
+                "extracted_number": f"{rng.randrange(10 ** 9):09d}",
+                "created_at": base + timedelta(seconds=offset + i),
+            } for i in range(n)])
+            conn.execute(insert(ApplicationUploadSave), [{
+                "id": str(uuid.uuid4()),
+                "application_type": rng.choice(APPLICATION_TYPES),
+                "content": "statement line\n" * 20,
+                "created_at": base + timedelta(seconds=offset + i),
+            } for i in range(n)])
+
+
+def time_lookups(repeat):
+    db = SessionLocal()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.query(DocumentUploadSave.extracted_number).filter(
+                DocumentUploadSave.document_type == "ssn"
+            ).order_by(DocumentUploadSave.created_at.desc()).first()
+            db.query(ApplicationUploadSave.content).filter(
+                ApplicationUploadSave.application_type == "bank_statement"
+            ).order_by(ApplicationUploadSave.created_at.desc()).first()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2] * 1000 / 2
+    finally:
+        db.close()
+
+
+def set_indexes(enabled):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_document_upload_type_created_at"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_application_upload_type_created_at"))
+    if enabled:
+        ensure_indexes(engine, DocumentUploadSave.__table__)
+        ensure_indexes(engine, ApplicationUploadSave.__table__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    filled = 0
+    print(f"{'rows':>10s} {'indexed ms':>11s} {'full scan ms':>13s}")
+    for target in sorted(args.rows):
+        set_indexes(False)
+        fill(filled, target)
+        filled = target
+        scan = time_lookups(max(3, args.repeat // 5))
+        set_indexes(True)
+        indexed = time_lookups(args.repeat)
+        print(f"{target:>10d} {indexed:>11.3f} {scan:>13.3f}")
+
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT extracted_number FROM document_upload "
+            "WHERE document_type = 'ssn' ORDER BY created_at DESC LIMIT 1")).fetchall()
+    print("plan:", "; ".join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    main()
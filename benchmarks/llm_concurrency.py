@@ -0,0 +1,91 @@
+"""Concurrency benchmark for the async LLM layer.
+
+Drives N simultaneous ``/upload_personal_documents`` and ``/upload_bank_documents``
+requests through the ASGI app with the OpenAI client replaced by a stub that
+sleeps for a fixed latency. With the async layer the batch finishes in roughly
+one LLM latency; the blocking baseline (the old behaviour) serialises them.
+
+    python benchmarks/llm_concurrency.py --requests 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from common import prepare_environment, make_pdf
+
+prepare_environment()
+
+import httpx
+import utils
+import classifier
+from cache import llm_result_cache
+from main import app
+
+
+class StubResponses:
+    def __init__(self, latency, blocking):
+        self.latency = latency
+        self.blocking = blocking
+
+    async def create(self, model, input, **kwargs):
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        text = input if isinstance(input, str) else input[0]["content"][0]["text"]
+        if '"is_valid"' in text:
+            output = '{"is_valid": true, "document_type": "driving_license", "extracted_number": "123-45-6789"}'
+        else:
+            output = "True" if "verify" in text else "123456789"
+        return SimpleNamespace(output_text=output)
+
+
+async def run_batch(n_requests):
+    pdf = make_pdf(["DRIVER LICENSE\nDL NO 123456789"])
+    statement = make_pdf(["BANK STATEMENT\nOpening balance 1000.00"])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            if i % 2:
+                return await client.post(
+                    "/upload_bank_documents",
+                    params={"application_type": "bank_statement"},
+                    files={"file": ("statement.pdf", statement, "application/pdf")},
+                )
+            return await client.post(
+                "/upload_personal_documents",
+                params={"document_type": "driving_license"},
+                files={"file": ("license.pdf", pdf, "application/pdf")},
+            )
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+    failures = sum(1 for r in responses if r.status_code != 200)
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated LLM latency in seconds")
+    args = parser.parse_args()
+
+    # Every upload in the batch has the same bytes; measure the LLM path, not the result cache
+    # or the local bank pre-screen
+    llm_result_cache.enabled = False
+    classifier.bank_classifier_enabled = False
+
+    for label, blocking in (("blocking client (baseline)", True), ("async LLM layer", False)):
+        utils.async_client = SimpleNamespace(responses=StubResponses(args.latency, blocking))
+        utils.llm_semaphore = asyncio.Semaphore(utils.llm_max_concurrency)
+        elapsed, failures = asyncio.run(run_batch(args.requests))
+        print(
+            f"{label:28s} {args.requests} uploads in {elapsed:6.2f}s "
+            f"({args.requests / elapsed:7.1f} req/s, {failures} failures)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Wall-clock benchmark for chunked PDF page extraction.
+
+Builds a synthetic multi-page bank statement and extracts it with an
+increasing number of pool workers. Extraction time for large statements
+should fall roughly with the number of cores.
+
+    python benchmarks/pdf_extraction.py --pages 60 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import time
+
+from common import prepare_environment, make_pdf
+
+prepare_environment()
+
+import utils
+
+
+def statement_pages(n_pages, lines_per_page=45):
+    pages = []
+    for p in range(n_pages):
+        lines = [f"BANK STATEMENT page {p + 1}"]
+        for i in range(lines_per_page):
+            lines.append(f"2024-01-{i % 28 + 1:02d}  POS PURCHASE MERCHANT {p:03d}-{i:03d}  -{(p * 37 + i * 13) % 900}.{i:02d}")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdf_bytes = make_pdf(statement_pages(args.pages))
+    print(f"{args.pages}-page statement, {len(pdf_bytes) / 1024:.0f} KiB, {utils.pdf_pages_per_chunk} pages per chunk")
+
+    for workers in args.workers:
+        utils.shutdown_pdf_pool()
+        utils.pdf_workers = workers
+        # Warm the pool so process start-up is not part of the measurement
+        asyncio.run(utils.extract_text_from_pdf_async(pdf_bytes))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            text = asyncio.run(utils.extract_text_from_pdf_async(pdf_bytes))
+            timings.append(time.perf_counter() - start)
+        print(f"workers={workers:<3d} best {min(timings):6.3f}s  mean {sum(timings) / len(timings):6.3f}s  ({len(text)} chars)")
+    utils.shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Local stand-ins for the external services the API talks to.
+
+Each factory returns a small FastAPI app that mimics the upstream's
+request/response shape, with configurable latency and error rate, so the
+service can be exercised without spending real credits.
+"""
+import asyncio
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+
+def create_scoring_stub(ready_after=3.0, latency=0.05, error_rate=0.0, seed=None, status_code=None, non_json=False):
+    """AryaXAI ``get-case-profile`` stand-in: pending until ``ready_after`` seconds after the first poll.
+
+    ``status_code`` makes every call fail with that status and ``non_json``
+    answers with an HTML page; the ``refresh`` flag of each call is kept in
+    ``app.state.refresh``.
+    """
+    app = FastAPI(title="Scoring API stub")
+    rng = random.Random(seed)
+    first_seen = {}
+    app.state.calls = 0
+    app.state.refresh = []
+
+    @app.post("/v2/project/get-case-profile")
+    async def get_case_profile(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        app.state.refresh.append(body.get("refresh"))
+        await asyncio.sleep(latency)
+        if status_code is not None:
+            return JSONResponse(status_code=status_code, content={"success": False, "message": "stub error"})
+        if non_json:
+            return PlainTextResponse("<html><body>Service temporarily unavailable</body></html>")
+        if rng.random() < error_rate:
+            return JSONResponse(status_code=503, content={"success": False, "message": "stub failure"})
+
+        case_id = body.get("unique_identifier")
+        started = first_seen.setdefault(case_id, time.monotonic())
+        if time.monotonic() - started < ready_after:
+            return {"success": True, "status": "processing", "message": "Case is being scored"}
+        return {
+            "success": True,
+            "status": "completed",
+            "details": {
+                "unique_identifier": case_id,
+                "tag": body.get("tag"),
+                "prediction": "Fully Paid",
+                "prediction_probability": 0.87,
+            },
+        }
+
+    return app
+
+
+def create_langflow_stub(latency=1.0, error_rate=0.0, seed=None):
+    """Langflow ``/api/v1/run/{flow_id}`` stand-in returning a chat message after ``latency`` seconds"""
+    app = FastAPI(title="Langflow stub")
+    rng = random.Random(seed)
+
+    @app.post("/api/v1/run/{flow_id}")
+    async def run_flow(flow_id: str):
+        await asyncio.sleep(latency)
+        if rng.random() < error_rate:
+            return JSONResponse(status_code=500, content={"detail": "stub failure"})
+        message = {"data": {"text": f"Underwriting analysis from flow {flow_id}: APPROVE"}}
+        return {"outputs": [{"outputs": [{"results": {"message": message}}]}]}
+
+    return app
+
+
+def create_openai_stub(latency=0.5, error_rate=0.0, seed=None):
+    """OpenAI Responses API (``POST /v1/responses``) stand-in.
+
+    Answers the fused prompt with a JSON verdict, verification prompts with
+    ``True`` and extraction prompts with a nine-digit number.
+    """
+    app = FastAPI(title="OpenAI stub")
+    rng = random.Random(seed)
+    app.state.calls = 0
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(latency)
+        if rng.random() < error_rate:
+            return JSONResponse(status_code=500, content={"error": {"message": "stub failure", "type": "server_error"}})
+
+        prompt = body.get("input")
+        if not isinstance(prompt, str):
+            prompt = " ".join(part.get("text", "") for message in prompt for part in message.get("content", []))
+        match = re.search(r'"document_type": "([^"]*)"', prompt)
+        document_type = match.group(1) if match else ""
+        number = f"{rng.randrange(10 ** 8, 10 ** 9)}"
+        if '"is_valid"' in prompt:
+            text = f'{{"is_valid": true, "document_type": "{document_type}", "extracted_number": "{number}"}}'
+        elif "verify whether" in prompt:
+            text = "True"
+        else:
+            text = number
+        return {
+            "id": f"resp_{app.state.calls}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model"),
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": f"msg_{app.state.calls}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4,
+                      "total_tokens": (len(prompt) + len(text)) // 4},
+        }
+
+    return app
+
+
+def create_cloudinary_stub(latency=0.3, error_rate=0.0, seed=None):
+    """Cloudinary upload API stand-in; point the SDK at it with ``cloudinary.config(upload_prefix=...)``"""
+    app = FastAPI(title="Cloudinary stub")
+    rng = random.Random(seed)
+    app.state.uploads = 0
+
+    @app.post("/v1_1/{cloud_name}/{resource_type}/upload")
+    async def upload(cloud_name: str, resource_type: str, request: Request):
+        await request.body()
+        app.state.uploads += 1
+        await asyncio.sleep(latency)
+        if rng.random() < error_rate:
+            return JSONResponse(status_code=500, content={"error": {"message": "stub failure"}})
+        public_id = f"stub_{app.state.uploads}"
+        return {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "secure_url": f"https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{public_id}.jpg",
+        }
+
+    return app
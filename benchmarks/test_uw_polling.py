@@ -0,0 +1,78 @@
+"""Checks of the case profile poller against the scoring API stand-in.
+
+    python -m pytest benchmarks/test_uw_polling.py -q
+"""
+import asyncio
+import time
+
+import pytest
+
+from common import prepare_environment
+
+prepare_environment()
+
+import httpx
+from fastapi import HTTPException
+
+import scoring
+from stub_upstreams import create_scoring_stub
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(scoring, "uw_api_base_url", "http://stub")
+    monkeypatch.setattr(scoring, "uw_poll_initial_delay", 0.05)
+    monkeypatch.setattr(scoring, "uw_poll_interval", 0.05)
+    monkeypatch.setattr(scoring, "uw_poll_max_interval", 0.2)
+    monkeypatch.setattr(scoring, "uw_poll_backoff", 2.0)
+    monkeypatch.setattr(scoring, "uw_poll_deadline", 5.0)
+
+
+def poll(stub, case_id="case-1"):
+    """Run poll_case_profile against ``stub``; returns ``(data, raw_text, seconds)``"""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stub), base_url="http://stub") as client:
+            start = time.perf_counter()
+            data, raw_text = await scoring.poll_case_profile("377", case_id, client=client)
+            return data, raw_text, time.perf_counter() - start
+    return asyncio.run(run())
+
+
+def test_returns_soon_after_the_case_is_ready():
+    stub = create_scoring_stub(ready_after=0.5, latency=0.01)
+    data, _, elapsed = poll(stub)
+    assert scoring.is_case_profile_ready(data)
+    # No later than one maximum poll interval (plus request latency) after the case became ready
+    assert 0.5 <= elapsed < 0.5 + scoring.uw_poll_max_interval + 0.3
+
+
+def test_gives_up_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(scoring, "uw_poll_deadline", 0.6)
+    stub = create_scoring_stub(ready_after=60, latency=0.01)
+    data, raw_text, elapsed = poll(stub)
+    assert not scoring.is_case_profile_ready(data)
+    assert data["status"] == "processing" and raw_text
+    assert 0.6 <= elapsed < 1.0
+
+
+def test_requests_the_refresh_only_once():
+    stub = create_scoring_stub(ready_after=0.4, latency=0.01)
+    poll(stub)
+    assert stub.state.calls > 2
+    assert stub.state.refresh == ["true"] + ["false"] * (stub.state.calls - 1)
+
+
+def test_non_json_body_is_returned_straight_away():
+    stub = create_scoring_stub(non_json=True, latency=0.01)
+    data, raw_text, _ = poll(stub)
+    assert data is None
+    assert raw_text.startswith("<html>")
+    assert stub.state.calls == 1
+
+
+def test_upstream_4xx_becomes_502():
+    stub = create_scoring_stub(status_code=403, latency=0.01)
+    with pytest.raises(HTTPException) as excinfo:
+        poll(stub)
+    assert excinfo.value.status_code == 502
+    assert stub.state.calls == 1
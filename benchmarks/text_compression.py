@@ -0,0 +1,88 @@
+"""Compression ratio and encode/decode cost of the CompressedText column codecs.
+
+Runs every available codec and level over synthetic bank statements and
+underwriting analyses of several sizes and reports the stored size relative
+to the original and the median encode/decode time.
+
+    python benchmarks/text_compression.py --sizes 5000 50000 500000 --repeat 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from common import prepare_environment
+
+prepare_environment()
+
+import compression
+from compression import compress_text, decompress_text
+
+
+def statement_text(chars, seed=0):
+    rng = random.Random(seed)
+    lines = ["FIRST NATIONAL BANK", "Account Statement", "Statement Period 01/01/2024 - 12/31/2024",
+             "Opening Balance 12,408.17"]
+    merchants = ["POS PURCHASE GROCERY MART", "ATM WITHDRAWAL", "PAYROLL DEPOSIT ACME CORP", "ONLINE TRANSFER TO SAVINGS",
+                 "CARD PURCHASE FUEL STATION", "ACH DEBIT ELECTRIC UTILITY", "CHECK #", "MOBILE DEPOSIT"]
+    balance = 12408.17
+    while sum(len(line) + 1 for line in lines) < chars:
+        amount = round(rng.uniform(3, 1800), 2)
+        balance += amount if rng.random() < 0.3 else -amount
+        lines.append(f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} {rng.choice(merchants)} "
+                     f"{rng.randint(1000, 9999)} {amount:,.2f} {balance:,.2f}")
+    return "\n".join(lines)[:chars]
+
+
+def analysis_text(chars, seed=0):
+    rng = random.Random(seed)
+    sentences = [
+        "The applicant's reported income is consistent with recurring payroll deposits.",
+        "Average monthly balance declined over the last quarter of the statement period.",
+        "No returned items or overdraft fees were observed.",
+        f"Debt-to-income ratio is estimated at {rng.uniform(10, 40):.1f} percent.",
+        "Stated employment could not be independently verified from the documents provided.",
+        "Cash withdrawals are elevated relative to the applicant's declared expenses.",
+        "Recommendation: approve with standard terms subject to income verification.",
+    ]
+    out = []
+    while sum(len(s) + 1 for s in out) < chars:
+        out.append(rng.choice(sentences))
+    return " ".join(out)[:chars]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000, 200000, 1000000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    codecs = [("zlib", 1), ("zlib", 6), ("zlib", 9)]
+    if compression.zstandard is not None:
+        codecs += [("zstd", 3), ("zstd", 10)]
+    else:
+        print("zstandard not installed; only zlib is measured\n")
+
+    print(f"{'document':<10}{'chars':>9}  {'codec':<8}{'stored %':>9}{'encode ms':>11}{'decode ms':>11}")
+    for kind, build in (("statement", statement_text), ("analysis", analysis_text)):
+        for size in args.sizes:
+            text = build(size)
+            for codec, level in codecs:
+                encoded, encode_s = timed(lambda: compress_text(text, codec, level), args.repeat)
+                decoded, decode_s = timed(lambda: decompress_text(encoded), args.repeat)
+                assert decoded == text
+                print(f"{kind:<10}{len(text):>9}  {codec + '-' + str(level):<8}{100 * len(encoded) / len(text):>8.1f}%"
+                      f"{encode_s * 1000:>11.3f}{decode_s * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Exercise get_uw_results against a local stand-in for the scoring API.
+
+Compares how long the adaptive poller takes to return for cases that become
+ready at different times, how many upstream calls it makes, and that it
+gives up at the deadline for cases that never finish.
+
+    python benchmarks/uw_polling.py --ready-after 0.5 3 10 --deadline 8
+"""
+import argparse
+import asyncio
+import time
+
+from common import prepare_environment
+
+prepare_environment()
+
+import httpx
+import scoring
+from stub_upstreams import create_scoring_stub
+
+
+async def poll_once(ready_after, error_rate):
+    stub = create_scoring_stub(ready_after=ready_after, latency=0.02, error_rate=error_rate, seed=7)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stub), base_url="http://stub") as client:
+        start = time.perf_counter()
+        data, _ = await scoring.poll_case_profile("377", f"case-{ready_after}", client=client)
+        elapsed = time.perf_counter() - start
+    return elapsed, stub.state.calls, scoring.is_case_profile_ready(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ready-after", type=float, nargs="+", default=[0.5, 3.0, 12.0])
+    parser.add_argument("--deadline", type=float, default=8.0)
+    parser.add_argument("--initial-delay", type=float, default=0.2)
+    parser.add_argument("--interval", type=float, default=0.25)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    scoring.uw_api_base_url = "http://stub"
+    scoring.uw_poll_deadline = args.deadline
+    scoring.uw_poll_initial_delay = args.initial_delay
+    scoring.uw_poll_interval = args.interval
+
+    for ready_after in args.ready_after:
+        elapsed, calls, ready = asyncio.run(poll_once(ready_after, args.error_rate))
+        print(f"ready after {ready_after:5.1f}s -> returned in {elapsed:5.2f}s "
+              f"after {calls:2d} calls, complete={ready}")
+
+
+if __name__ == "__main__":
+    main()
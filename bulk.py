@@ -0,0 +1,131 @@
+import io
+import os
+import json
+import time
+import asyncio
+import zipfile
+from pathlib import PurePosixPath
+
+from fastapi import HTTPException
+
+from database import SessionLocal
+from metrics import metric_labels
+from schemas import ApplicationDocumentType, StatementDocumentType
+from pipeline import (PERSONAL_DOCUMENT_EXTENSIONS, BANK_DOCUMENT_EXTENSIONS, validate_extension,
+                      process_personal_document, process_bank_document)
+
+bulk_upload_concurrency = int(os.environ.get('BULK_UPLOAD_CONCURRENCY', '8'))
+bulk_max_files = int(os.environ.get('BULK_MAX_FILES', '1000'))
+
+MANIFEST_NAME = "manifest.json"
+
+def parse_manifest(manifest) -> dict:
+    """Parse a ``{"filename": "document_type"}`` manifest given as JSON text or bytes"""
+    if not manifest:
+        return {}
+    try:
+        parsed = json.loads(manifest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Manifest is not valid JSON: {e}")
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="Manifest must map file names to document types")
+    return {str(k): str(v) for k, v in parsed.items()}
+
+def collect_bulk_items(uploads: list, manifest: str = None) -> tuple[list, dict]:
+    """Expand the uploaded files (and any ZIP archives among them) into ``(filename, loader)`` pairs.
+
+    Returns the items and the combined manifest: a ``manifest.json`` inside an
+    archive is merged under the manifest sent with the request.
+    """
+    items = []
+    document_types = {}
+    for filename, data in uploads:
+        if PurePosixPath(filename).suffix.lower() != '.zip':
+            items.append((filename, lambda data=data: data))
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile as e:
+            raise HTTPException(status_code=400, detail=f"{filename} is not a valid ZIP archive: {e}")
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or PurePosixPath(name).name.startswith('.'):
+                continue
+            if PurePosixPath(name).name == MANIFEST_NAME:
+                document_types.update(parse_manifest(archive.read(info)))
+                continue
+            items.append((name, lambda archive=archive, info=info: archive.read(info)))
+
+    document_types.update(parse_manifest(manifest))
+    if len(items) > bulk_max_files:
+        raise HTTPException(status_code=413, detail=f"{len(items)} files in batch, the limit is {bulk_max_files}")
+    return items, document_types
+
+def _resolve_document_type(filename: str, document_types: dict):
+    value = document_types.get(filename, document_types.get(PurePosixPath(filename).name))
+    if value is None:
+        raise HTTPException(status_code=400, detail="No document type given in the manifest")
+    for enum in (ApplicationDocumentType, StatementDocumentType):
+        try:
+            return enum(value)
+        except ValueError:
+            pass
+    raise HTTPException(status_code=400, detail=f"Unknown document type: {value}")
+
+async def process_bulk_item(index: int, filename: str, loader, document_types: dict, semaphore) -> dict:
+    """Run one file through the verify, extract and save pipeline with its own session"""
+    async with semaphore:
+        start = time.perf_counter()
+        line = {"index": index, "filename": filename}
+        db = SessionLocal()
+        try:
+            document_type = _resolve_document_type(filename, document_types)
+            line["document_type"] = document_type.value
+            with metric_labels(endpoint="bulk_upload_documents", document_type=document_type):
+                if isinstance(document_type, ApplicationDocumentType):
+                    validate_extension(filename, PERSONAL_DOCUMENT_EXTENSIONS)
+                    result = await process_personal_document(filename, loader(), document_type, db)
+                else:
+                    validate_extension(filename, BANK_DOCUMENT_EXTENSIONS)
+                    result = await process_bank_document(loader(), document_type, db)
+            if result is None:
+                raise HTTPException(status_code=500, detail="Verification returned no decision")
+            line["status"] = "processed"
+            # Statement text is saved to the database; echoing it back would bloat the stream
+            line["result"] = result.model_dump(exclude={"content"})
+        except HTTPException as e:
+            db.rollback()
+            line["status"] = "error"
+            line["error"] = str(e.detail)
+        except Exception as e:
+            db.rollback()
+            line["status"] = "error"
+            line["error"] = str(e)
+        finally:
+            db.close()
+        line["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return line
+
+async def stream_bulk_results(items: list, document_types: dict):
+    """Yield one NDJSON line per file as soon as it finishes, then a summary line"""
+    semaphore = asyncio.Semaphore(bulk_upload_concurrency)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(process_bulk_item(i, filename, loader, document_types, semaphore))
+             for i, (filename, loader) in enumerate(items)]
+    counts = {"processed": 0, "accepted": 0, "rejected": 0, "error": 0}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            if line["status"] == "processed":
+                counts["processed"] += 1
+                counts["accepted" if line["result"]["success"] else "rejected"] += 1
+            else:
+                counts["error"] += 1
+            yield json.dumps(line) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    elapsed = time.perf_counter() - start
+    yield json.dumps({"summary": {"files": len(items), **counts, "elapsed_s": round(elapsed, 3),
+                                  "files_per_s": round(len(items) / elapsed, 2) if elapsed else None}}) + "\n"
@@ -0,0 +1,238 @@
+"""Streaming import of bureau extracts (CSV, gzipped CSV or Parquet) into the Bureau table.
+
+The file is read in batches and each batch is upserted by SSN with a single
+INSERT ... ON CONFLICT statement, so memory stays bounded by the batch size
+however large the extract is.
+
+    python bureau_import.py bureau_2024q4.csv.gz
+    python bureau_import.py bureau_2024q4.parquet --batch-size 20000
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from sqlalchemy import Integer, BigInteger, SmallInteger, Numeric
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import SessionLocal, Bureau
+from cache import lookup_cache
+
+bureau_import_batch_size = int(os.environ.get('BUREAU_IMPORT_BATCH_SIZE', '5000'))
+
+# Columns an extract may provide; id and created_at are owned by the service
+BUREAU_IMPORT_COLUMNS = {
+    column.name: column for column in Bureau.__table__.columns if column.name not in ("id", "created_at")
+}
+
+IMPORT_FORMATS = ("csv", "csv.gz", "parquet")
+
+
+class RowRejected(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    for fmt in ("csv.gz", "parquet", "csv"):
+        if name.endswith("." + fmt):
+            return fmt
+    raise ValueError(f"Unsupported bureau extract {filename!r}; expected one of {', '.join(IMPORT_FORMATS)}")
+
+
+def _integer_limit(column_type) -> int:
+    if isinstance(column_type, BigInteger):
+        return 2 ** 63
+    if isinstance(column_type, SmallInteger):
+        return 2 ** 15
+    return 2 ** 31
+
+
+def convert_value(column, raw):
+    """Coerce one extract value to the column's type; blanks become NULL.
+
+    Values the database would refuse (non-finite numbers, values beyond the
+    column's precision, fractional integers) reject the row instead of
+    aborting the batch.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.strip()
+        if raw == "" or raw.lower() in ("nan", "null", "none"):
+            return None
+    try:
+        if isinstance(column.type, Numeric):
+            # LendingClub extracts write ratios as "22.5%"
+            value = Decimal(str(raw).rstrip("%").replace(",", ""))
+            if not value.is_finite():
+                raise RowRejected(f"bad {column.name}")
+            precision, scale = column.type.precision, column.type.scale or 0
+            if precision is None:
+                return value
+            limit = Decimal(10) ** (precision - scale)
+            if abs(value) < limit:
+                # Round to the column scale the way Postgres does, then re-check (999.999 rounds up to 1000.00)
+                value = value.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+            if abs(value) >= limit:
+                raise RowRejected(f"{column.name} out of range")
+            return value
+        if isinstance(column.type, Integer):
+            value = Decimal(str(raw).replace(",", ""))
+            if not value.is_finite() or value != value.to_integral_value():
+                raise RowRejected(f"bad {column.name}")
+            if not -_integer_limit(column.type) <= value < _integer_limit(column.type):
+                raise RowRejected(f"{column.name} out of range")
+            return int(value)
+    except RowRejected:
+        raise
+    except (InvalidOperation, ValueError):
+        raise RowRejected(f"bad {column.name}")
+    return str(raw)
+
+
+def map_row(record: dict, columns: list) -> dict:
+    """Map one extract record onto Bureau columns"""
+    ssn = str(record.get("ssn") or "").strip().replace("-", "")
+    if not ssn:
+        raise RowRejected("missing ssn")
+    row = {column: convert_value(BUREAU_IMPORT_COLUMNS[column], record.get(column)) for column in columns}
+    row["ssn"] = ssn
+    return row
+
+
+def iter_csv_batches(fileobj, batch_size: int, compressed: bool = False):
+    """Yield ``(columns, records)`` batches from a CSV stream"""
+    if compressed:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    batch = []
+    for record in reader:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield reader.fieldnames, batch
+            batch = []
+    if batch:
+        yield reader.fieldnames, batch
+
+
+def iter_parquet_batches(fileobj, batch_size: int):
+    """Yield ``(columns, records)`` batches from a Parquet file, reading only the Bureau columns"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet import requires pyarrow (pip install pyarrow)")
+    parquet_file = pq.ParquetFile(fileobj)
+    fields = {name.lower(): name for name in parquet_file.schema_arrow.names}
+    wanted = [fields[name] for name in fields if name in BUREAU_IMPORT_COLUMNS]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=wanted):
+        records = [{key.lower(): value for key, value in record.items()} for record in batch.to_pylist()]
+        yield list(fields), records
+
+
+def upsert_batch(db, rows: list, columns: list):
+    """Insert new SSNs and update existing ones in a single statement"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(Bureau)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(Bureau)
+    else:
+        raise ValueError(f"Bureau import does not support the {dialect} dialect")
+
+    updates = {column: statement.excluded[column] for column in columns if column != "ssn"}
+    statement = statement.on_conflict_do_update(index_elements=["ssn"], set_=updates)
+    db.execute(statement, rows)
+    db.commit()
+
+
+def import_bureau_file(fileobj, fmt: str, batch_size: int = None, progress=None) -> dict:
+    """Stream an extract into Bureau, upserting by SSN; returns counts and throughput"""
+    batch_size = batch_size or bureau_import_batch_size
+    if fmt == "parquet":
+        batches = iter_parquet_batches(fileobj, batch_size)
+    elif fmt in ("csv", "csv.gz"):
+        batches = iter_csv_batches(fileobj, batch_size, compressed=fmt == "csv.gz")
+    else:
+        raise ValueError(f"Unsupported bureau extract format {fmt!r}")
+
+    reject_reasons = Counter()
+    rows_read = upserted = 0
+    unknown_columns = set()
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for fieldnames, records in batches:
+            if "ssn" not in fieldnames:
+                raise ValueError("Bureau extract has no ssn column")
+            unknown_columns.update(name for name in fieldnames if name not in BUREAU_IMPORT_COLUMNS)
+            columns = [name for name in fieldnames if name in BUREAU_IMPORT_COLUMNS]
+
+            # Later rows for the same SSN win; ON CONFLICT cannot touch one row twice in a statement
+            rows = {}
+            for record in records:
+                rows_read += 1
+                try:
+                    row = map_row(record, columns)
+                except RowRejected as e:
+                    reject_reasons[str(e)] += 1
+                    continue
+                rows[row["ssn"]] = row
+            if not rows:
+                continue
+
+            for row in rows.values():
+                row["id"] = str(uuid.uuid4())
+                row["created_at"] = now
+            upsert_batch(db, list(rows.values()), columns)
+            upserted += len(rows)
+            if progress:
+                progress(rows_read, time.perf_counter() - started)
+    finally:
+        db.close()
+        # Core upserts bypass the ORM flush hook that normally invalidates cached lookups
+        lookup_cache.invalidate("bureau")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows_read": rows_read,
+        "rows_upserted": upserted,
+        "rows_rejected": sum(reject_reasons.values()),
+        "reject_reasons": dict(reject_reasons.most_common(20)),
+        "ignored_columns": sorted(unknown_columns),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_read / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV, .csv.gz or Parquet extract")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="override detection from the file extension")
+    parser.add_argument("--batch-size", type=int, default=bureau_import_batch_size)
+    args = parser.parse_args()
+
+    def progress(rows_read, elapsed):
+        print(f"{rows_read:>12,} rows read ({rows_read / elapsed:,.0f}/s)")
+
+    with open(args.path, "rb") as fileobj:
+        summary = import_bureau_file(fileobj, args.format or detect_format(args.path), args.batch_size, progress)
+    print(f"Upserted {summary['rows_upserted']:,} of {summary['rows_read']:,} rows, "
+          f"rejected {summary['rows_rejected']:,} in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s)")
+    if summary["reject_reasons"]:
+        print(f"Reject reasons: {summary['reject_reasons']}")
+    if summary["ignored_columns"]:
+        print(f"Ignored columns: {', '.join(summary['ignored_columns'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, LLMResultCacheEntry, DrivingLicense, SSNRecord, Bureau, KYC
+
+llm_cache_enabled = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+llm_cache_max_entries = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '1024'))
+llm_cache_ttl_seconds = float(os.environ.get('LLM_CACHE_TTL_SECONDS', '86400'))
+llm_cache_db_ttl_seconds = float(os.environ.get('LLM_CACHE_DB_TTL_SECONDS', str(30 * 86400)))
+
+lookup_cache_enabled = os.environ.get('LOOKUP_CACHE_ENABLED', 'true').lower() == 'true'
+lookup_cache_max_entries = int(os.environ.get('LOOKUP_CACHE_MAX_ENTRIES', '10000'))
+lookup_cache_ttl_seconds = float(os.environ.get('LOOKUP_CACHE_TTL_SECONDS', '300'))
+lookup_cache_negative_ttl_seconds = float(os.environ.get('LOOKUP_CACHE_NEGATIVE_TTL_SECONDS', '30'))
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return ``(found, value)``, dropping the entry if it has expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key satisfies ``predicate``"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LLMResultCache:
+    """Two-tier cache of LLM verification/extraction results keyed on the uploaded bytes.
+
+    The in-process LRU answers repeat uploads handled by the same worker, the
+    ``llm_result_cache`` table shares results across workers and restarts.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, db_ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self.db_ttl = db_ttl
+        self.memory = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def key_for(data: bytes, document_type, scope: str) -> str:
+        """SHA-256 of the file contents plus the requested document type and the model/prompt ``scope``"""
+        document_type = getattr(document_type, 'value', document_type)
+        return f"{hashlib.sha256(data).hexdigest()}:{document_type}:{scope}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, db: Session, key: str):
+        """Return the cached result dict for ``key`` or None on a miss"""
+        if not self.enabled:
+            return None
+
+        found, value = self.memory.get(key)
+        if found:
+            self._count('memory_hits')
+            return value
+
+        entry = db.query(LLMResultCacheEntry).filter(LLMResultCacheEntry.cache_key == key).first()
+        if entry and entry.created_at >= datetime.utcnow() - timedelta(seconds=self.db_ttl):
+            value = json.loads(entry.result)
+            self.memory.set(key, value)
+            self._count('db_hits')
+            return value
+
+        self._count('misses')
+        return None
+
+    def set(self, db: Session, key: str, value: dict):
+        """Store ``value`` in both tiers; a failing table write never fails the upload"""
+        if not self.enabled:
+            return
+
+        self.memory.set(key, value)
+        try:
+            db.merge(LLMResultCacheEntry(cache_key=key, result=json.dumps(value), created_at=datetime.utcnow()))
+            db.commit()
+            self._count('stores')
+        except Exception as e:
+            db.rollback()
+            print(f"Couldn't persist LLM cache entry due to: {e}")
+
+    def clear(self, db: Session = None) -> int:
+        """Drop every cached result; returns the number of table rows deleted"""
+        self.memory.clear()
+        if db is None:
+            return 0
+        deleted = db.query(LLMResultCacheEntry).delete()
+        db.commit()
+        return deleted
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete table rows older than the table TTL; returns the number deleted"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.db_ttl)
+        deleted = db.query(LLMResultCacheEntry).filter(LLMResultCacheEntry.created_at < cutoff).delete()
+        db.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.maxsize,
+        }
+
+
+llm_result_cache = LLMResultCache(llm_cache_max_entries, llm_cache_ttl_seconds,
+                                  llm_cache_db_ttl_seconds, enabled=llm_cache_enabled)
+
+
+class ReadThroughCache:
+    """In-process read-through cache for the SSN, driving license, bureau and KYC lookups.
+
+    Entries are keyed by ``(namespace, key)``. Lookups that found nothing are
+    cached too, with a shorter TTL, so repeated 404s skip the database.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self.negative_ttl = negative_ttl
+        self.entries = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.hit_seconds = 0.0
+        self.load_seconds = 0.0
+        self.max_load_seconds = 0.0
+
+    def get_or_load(self, namespace: str, key: str, loader):
+        """Return the cached value for ``key`` or call ``loader()`` and cache its result (None means not found)"""
+        start = time.perf_counter()
+        if self.enabled:
+            found, value = self.entries.get((namespace, key))
+            if found:
+                with self._lock:
+                    if value is self._MISSING:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    self.hit_seconds += time.perf_counter() - start
+                return None if value is self._MISSING else value
+
+        value = loader()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self.load_seconds += elapsed
+            self.max_load_seconds = max(self.max_load_seconds, elapsed)
+        if self.enabled:
+            if value is None:
+                self.entries.set((namespace, key), self._MISSING, ttl=self.negative_ttl)
+            else:
+                self.entries.set((namespace, key), value)
+        return value
+
+    def invalidate(self, namespace: str, key: str = None):
+        """Drop one entry, or every entry of ``namespace`` when no key is given"""
+        with self._lock:
+            self.invalidations += 1
+        if key is not None:
+            self.entries.pop((namespace, key))
+        else:
+            self.entries.discard_where(lambda cached_key: cached_key[0] == namespace)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += 1
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        hits = self.hits + self.negative_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "avg_hit_ms": self.hit_seconds / hits * 1000 if hits else 0.0,
+            "avg_load_ms": self.load_seconds / self.misses * 1000 if self.misses else 0.0,
+            "max_load_ms": self.max_load_seconds * 1000,
+            "entries": len(self.entries),
+            "max_entries": self.entries.maxsize,
+            "ttl_seconds": self.entries.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+        }
+
+
+lookup_cache = ReadThroughCache(lookup_cache_max_entries, lookup_cache_ttl_seconds,
+                                lookup_cache_negative_ttl_seconds, enabled=lookup_cache_enabled)
+
+# Model -> (cache namespace, attribute the lookup endpoint is keyed by)
+LOOKUP_CACHE_KEYS = {
+    DrivingLicense: ("driving_license", "license_number"),
+    SSNRecord: ("ssn", "ssn"),
+    Bureau: ("bureau", "ssn"),
+    KYC: ("kyc", "ssn"),
+}
+
+@event.listens_for(SessionLocal, "after_flush")
+def collect_lookup_invalidations(session, flush_context):
+    """Note the cache entries an ORM write to a cached model affects; they are dropped once it commits"""
+    pending = session.info.setdefault("lookup_cache_invalidations", set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        namespace_key = LOOKUP_CACHE_KEYS.get(type(instance))
+        if namespace_key is None:
+            continue
+        namespace, attribute = namespace_key
+        if instance in session.dirty:
+            # The key itself may have changed, so the old entry cannot be found by value
+            pending.add((namespace, None))
+        else:
+            pending.add((namespace, getattr(instance, attribute)))
+
+@event.listens_for(SessionLocal, "after_commit")
+def invalidate_lookup_cache(session):
+    """Drop the collected entries only after the commit, so no reader can re-cache the old row"""
+    for namespace, key in session.info.pop("lookup_cache_invalidations", ()):
+        lookup_cache.invalidate(namespace, key)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_lookup_invalidations(session):
+    session.info.pop("lookup_cache_invalidations", None)
@@ -0,0 +1,235 @@
+"""Local pre-screen that tells bank statements from bank applications.
+
+A presence-only naive Bayes over word unigrams and bigrams (title lines count
+as separate features) scores the PDF text. It only tells the two apart, so it
+never decides on its own that a document is a bank document at all: clear
+mismatches are rejected locally, and clear matches are accepted locally only
+with a trained model and bank-specific wording in the text. Everything else
+goes to the LLM.
+
+    python classifier.py train --out bank_classifier.json
+    python classifier.py evaluate --model bank_classifier.json --holdout 0.2
+"""
+import os
+import re
+import json
+import math
+import zlib
+import argparse
+from collections import Counter
+
+from metrics import bank_classifier_total
+
+bank_classifier_enabled = os.environ.get('BANK_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+bank_classifier_model_path = os.environ.get('BANK_CLASSIFIER_MODEL_PATH', 'bank_classifier.json')
+# Probability that the document is of the requested type at or above which it is accepted / at or below which it is rejected
+bank_classifier_accept_threshold = float(os.environ.get('BANK_CLASSIFIER_ACCEPT_THRESHOLD', '0.97'))
+bank_classifier_reject_threshold = float(os.environ.get('BANK_CLASSIFIER_REJECT_THRESHOLD', '0.03'))
+# Documents matching fewer known features than this always go to the LLM
+bank_classifier_min_evidence = int(os.environ.get('BANK_CLASSIFIER_MIN_EVIDENCE', '3'))
+bank_classifier_max_chars = int(os.environ.get('BANK_CLASSIFIER_MAX_CHARS', '8000'))
+# Distinct bank terms a document must contain before it can be accepted locally
+bank_classifier_min_bank_terms = int(os.environ.get('BANK_CLASSIFIER_MIN_BANK_TERMS', '2'))
+
+POSITIVE_LABEL = "bank_statement"
+NEGATIVE_LABEL = "bank_application"
+TITLE_LINES = 5
+
+# Used until a model has been trained from stored uploads; positive weights favour a statement
+DEFAULT_WEIGHTS = {
+    "title:statement": 3.0, "title:account statement": 3.5, "title:bank statement": 3.5,
+    "statement period": 2.5, "opening balance": 2.5, "closing balance": 2.5, "beginning balance": 2.5,
+    "ending balance": 2.5, "available balance": 1.5, "withdrawals": 1.5, "deposits": 1.0, "debit": 1.0,
+    "credit": 0.5, "transaction": 1.0, "transactions": 1.5, "balance forward": 2.0, "statement date": 2.0,
+    "title:application": -3.5, "title:loan application": -4.0, "title:account application": -3.5,
+    "application": -1.5, "applicant": -2.0, "co applicant": -2.0, "date of birth": -1.5, "employer": -1.5,
+    "annual income": -2.0, "monthly income": -1.5, "loan amount": -2.0, "requested amount": -2.0,
+    "purpose of loan": -2.5, "signature": -1.0, "i certify": -2.0, "years at address": -2.0, "occupation": -1.0,
+}
+
+# Wording that places a document at a bank rather than, say, a utility or an employer
+BANK_TERMS = re.compile(
+    r"\bbank(?:ing)?\b|credit\s+union|routing\s+(?:number|no\b|#)|\baba\b|\bfdic\b|\biban\b|sort\s+code"
+    r"|\bchecking\b|\bsavings\b|overdraft",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> list:
+    return re.findall(r"[a-z]+", text.lower())
+
+
+def bank_terms(text: str) -> set:
+    return {re.sub(r"\s+", " ", match.group(0).lower()) for match in BANK_TERMS.finditer(text[:bank_classifier_max_chars])}
+
+
+def features(text: str) -> set:
+    """Distinct unigram/bigram features, with the title lines also emitted under a ``title:`` prefix"""
+    text = text[:bank_classifier_max_chars]
+    found = set()
+    title = " ".join(line for line in text.splitlines()[:TITLE_LINES])
+    for prefix, tokens in (("", tokenize(text)), ("title:", tokenize(title))):
+        found.update(prefix + token for token in tokens)
+        found.update(f"{prefix}{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return found
+
+
+class BankDocumentClassifier:
+    def __init__(self, weights: dict, prior: float = 0.0, trained: bool = False):
+        self.weights = weights
+        self.prior = prior
+        # The built-in keyword weights are only trusted to reject
+        self.trained = trained
+
+    def score(self, text: str) -> tuple:
+        """Return ``(probability the text is a statement, number of matched features)``"""
+        matched = [self.weights[feature] for feature in features(text) if feature in self.weights]
+        logit = max(-30.0, min(30.0, self.prior + sum(matched)))
+        return 1 / (1 + math.exp(-logit)), len(matched)
+
+    def prescreen(self, content: str, application_type) -> str:
+        """'True'/'False' when the document is clearly (not) ``application_type``, None to defer to the LLM.
+
+        'True' is only returned by a trained model and for text with bank-specific terms.
+        """
+        application_type = getattr(application_type, 'value', application_type)
+        if not bank_classifier_enabled or application_type not in (POSITIVE_LABEL, NEGATIVE_LABEL):
+            return None
+
+        probability, evidence = self.score(content)
+        if application_type == NEGATIVE_LABEL:
+            probability = 1 - probability
+
+        verdict = None
+        if evidence >= bank_classifier_min_evidence:
+            if (probability >= bank_classifier_accept_threshold and self.trained
+                    and len(bank_terms(content)) >= bank_classifier_min_bank_terms):
+                verdict = 'True'
+            elif probability <= bank_classifier_reject_threshold:
+                verdict = 'False'
+        outcome = {'True': "accepted", 'False': "rejected", None: "fallback"}[verdict]
+        bank_classifier_total.inc(document_type=application_type, outcome=outcome)
+        return verdict
+
+    @classmethod
+    def train(cls, samples, min_count: int = 3, max_features: int = 5000, smoothing: float = 1.0):
+        """Fit log-odds weights from ``(text, application_type)`` pairs"""
+        document_counts = {POSITIVE_LABEL: Counter(), NEGATIVE_LABEL: Counter()}
+        totals = Counter()
+        for text, label in samples:
+            if label in document_counts:
+                totals[label] += 1
+                document_counts[label].update(features(text or ""))
+        if not totals[POSITIVE_LABEL] or not totals[NEGATIVE_LABEL]:
+            raise ValueError("Training needs stored examples of both bank_statement and bank_application")
+
+        positive, negative = document_counts[POSITIVE_LABEL], document_counts[NEGATIVE_LABEL]
+        weights = {}
+        for feature in set(positive) | set(negative):
+            if positive[feature] + negative[feature] < min_count:
+                continue
+            weights[feature] = (
+                math.log((positive[feature] + smoothing) / (totals[POSITIVE_LABEL] + 2 * smoothing))
+                - math.log((negative[feature] + smoothing) / (totals[NEGATIVE_LABEL] + 2 * smoothing))
+            )
+        strongest = sorted(weights, key=lambda feature: abs(weights[feature]), reverse=True)[:max_features]
+        prior = math.log(totals[POSITIVE_LABEL] / totals[NEGATIVE_LABEL])
+        return cls({feature: round(weights[feature], 4) for feature in strongest}, prior, trained=True)
+
+    def save(self, path: str):
+        with open(path, "w") as fh:
+            json.dump({"prior": self.prior, "weights": self.weights}, fh)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as fh:
+            model = json.load(fh)
+        return cls(model["weights"], model.get("prior", 0.0), trained=True)
+
+
+def load_bank_classifier(path: str = None) -> BankDocumentClassifier:
+    """The trained model at BANK_CLASSIFIER_MODEL_PATH, or the built-in keyword weights"""
+    path = path or bank_classifier_model_path
+    if path and os.path.exists(path):
+        print(f"Loaded bank document classifier from {path}")
+        return BankDocumentClassifier.load(path)
+    return BankDocumentClassifier(dict(DEFAULT_WEIGHTS))
+
+
+bank_classifier = load_bank_classifier()
+
+
+def stored_samples(db):
+    """Stream ``(content, application_type)`` pairs from ApplicationUploadSave"""
+    from database import ApplicationUploadSave
+
+    query = db.query(ApplicationUploadSave.id, ApplicationUploadSave.content, ApplicationUploadSave.application_type)
+    for row in query.yield_per(500):
+        yield row.id, row.content, row.application_type
+
+
+def evaluate(model: BankDocumentClassifier, samples) -> dict:
+    """Coverage and accuracy of the local verdicts at the configured thresholds"""
+    decided = correct = total = 0
+    for text, label in samples:
+        total += 1
+        # Ask the classifier to verify the document's true type; a reject is a mistake
+        verdict = model.prescreen(text, label)
+        if verdict is not None:
+            decided += 1
+            correct += verdict == 'True'
+        # and ask it to verify the wrong type; an accept is a mistake
+        other = NEGATIVE_LABEL if label == POSITIVE_LABEL else POSITIVE_LABEL
+        verdict = model.prescreen(text, other)
+        if verdict is not None:
+            decided += 1
+            correct += verdict == 'False'
+    checks = total * 2
+    return {
+        "documents": total,
+        "coverage": decided / checks if checks else 0.0,
+        "accuracy_when_decided": correct / decided if decided else 0.0,
+        "sent_to_llm": checks - decided,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--model", default=bank_classifier_model_path, help="model to evaluate")
+    parser.add_argument("--out", default=bank_classifier_model_path, help="where train writes the model")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="fraction of stored uploads kept out of training and used for evaluation")
+    parser.add_argument("--min-count", type=int, default=3)
+    parser.add_argument("--max-features", type=int, default=5000)
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    def in_holdout(row_id):
+        return zlib.crc32(row_id.encode()) % 1000 < args.holdout * 1000
+
+    db = SessionLocal()
+    try:
+        if args.command == "train":
+            model = BankDocumentClassifier.train(
+                ((content, label) for row_id, content, label in stored_samples(db) if not in_holdout(row_id)),
+                min_count=args.min_count, max_features=args.max_features,
+            )
+            model.save(args.out)
+            print(f"Trained {len(model.weights)} features (prior {model.prior:.3f}) -> {args.out}")
+        else:
+            model = load_bank_classifier(args.model)
+
+        result = evaluate(model, ((content, label) for row_id, content, label in stored_samples(db)
+                                  if in_holdout(row_id)))
+        print(f"Held-out documents: {result['documents']}, decided locally: {result['coverage']:.1%}, "
+              f"accuracy when decided: {result['accuracy_when_decided']:.1%}, "
+              f"LLM calls still needed: {result['sent_to_llm']} "
+              f"(accept >= {bank_classifier_accept_threshold}, reject <= {bank_classifier_reject_threshold})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
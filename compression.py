@@ -0,0 +1,93 @@
+import os
+import zlib
+import base64
+
+from sqlalchemy.types import TypeDecorator, String
+
+# Large text columns are stored compressed: a marker naming the codec, then the
+# compressed bytes as base64 so the column stays a plain string type. Values
+# without a marker are legacy plain text and are returned unchanged.
+text_compression = os.environ.get('TEXT_COMPRESSION', 'auto')  # auto | zstd | zlib | none
+text_compression_min_length = int(os.environ.get('TEXT_COMPRESSION_MIN_LENGTH', '512'))
+text_compression_level = int(os.environ.get('TEXT_COMPRESSION_LEVEL', '6'))
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_MARKER = "~zlib1~"
+ZSTD_MARKER = "~zstd1~"
+# Plain text that happens to start like a marker is escaped so it is never mistaken for compressed data
+RAW_MARKER = "~raw~"
+MARKERS = (ZLIB_MARKER, ZSTD_MARKER, RAW_MARKER)
+
+
+def _codec() -> str:
+    if text_compression == 'auto':
+        return 'zstd' if zstandard is not None else 'zlib'
+    if text_compression == 'zstd' and zstandard is None:
+        raise RuntimeError("TEXT_COMPRESSION=zstd needs the zstandard package")
+    return text_compression
+
+
+def compress_text(value: str, codec: str = None, level: int = None) -> str:
+    """Encode ``value`` for storage, leaving short or incompressible text as plain text"""
+    codec = codec or _codec()
+    level = level if level is not None else text_compression_level
+    if value.startswith("~") and value.startswith(MARKERS):
+        value = RAW_MARKER + value
+    if codec == 'none' or len(value) < text_compression_min_length:
+        return value
+
+    raw = value.encode("utf-8")
+    if codec == 'zstd':
+        encoded = ZSTD_MARKER + base64.b64encode(zstandard.ZstdCompressor(level=level).compress(raw)).decode("ascii")
+    else:
+        encoded = ZLIB_MARKER + base64.b64encode(zlib.compress(raw, level)).decode("ascii")
+    return encoded if len(encoded) < len(value) else value
+
+
+def decompress_text(value: str) -> str:
+    """Decode a stored value; legacy plain text passes through"""
+    if not value.startswith("~"):
+        return value
+    if value.startswith(RAW_MARKER):
+        return value[len(RAW_MARKER):]
+    try:
+        if value.startswith(ZLIB_MARKER):
+            text = zlib.decompress(base64.b64decode(value[len(ZLIB_MARKER):])).decode("utf-8")
+        elif value.startswith(ZSTD_MARKER) and zstandard is not None:
+            text = zstandard.ZstdDecompressor().decompress(base64.b64decode(value[len(ZSTD_MARKER):])).decode("utf-8")
+        elif value.startswith(ZSTD_MARKER):
+            raise RuntimeError("Reading zstd-compressed text needs the zstandard package")
+        else:
+            return value
+    except (ValueError, zlib.error):
+        # A legacy plain value that merely starts like a marker
+        return value
+    # compress_text escapes marker-like text before compressing it too
+    return text[len(RAW_MARKER):] if text.startswith(RAW_MARKER) else text
+
+
+def is_encoded(value: str) -> bool:
+    """Whether a stored value was already written by CompressedText (compressed or escaped)"""
+    return value is not None and value.startswith(MARKERS)
+
+
+class CompressedText(TypeDecorator):
+    """String column compressed on write and decompressed when loaded.
+
+    Decoding happens as rows are fetched, not on attribute access: every query
+    that selects these columns returns the text, so deferring would only add
+    a round trip per row.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value) if value is not None else None
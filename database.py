@@ -1,17 +1,105 @@
-from sqlalchemy import create_engine, Column, String, Date, DateTime, Integer
+from sqlalchemy import create_engine, Column, String, Date, DateTime, Integer, Numeric, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from datetime import datetime
 import os
+import time
+import threading
+
+from compression import CompressedText
 
 # Database setup
 
 database_url = os.environ.get('DATABASE_URL')
 
+# 'local' runs against a SQLite file (tests, development) and must be asked for explicitly;
+# 'server' requires DATABASE_URL so a misconfigured deploy fails at startup
+db_profile = os.environ.get('DB_PROFILE', 'server')
+local_database_url = os.environ.get('LOCAL_DATABASE_URL', 'sqlite:///./documents.db')
+
+db_pool_size = int(os.environ.get('DB_POOL_SIZE', '10'))
+db_max_overflow = int(os.environ.get('DB_MAX_OVERFLOW', '20'))
+db_pool_timeout = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+db_pool_pre_ping = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+db_pool_recycle = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+
 # SQLALCHEMY_DATABASE_URL = "sqlite:///./documents.db"
 # engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 
-engine = create_engine(database_url)
+pool_wait_stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+_pool_wait_lock = threading.Lock()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _pool_wait_lock:
+                pool_wait_stats["checkouts"] += 1
+                pool_wait_stats["timeouts"] += int(timed_out)
+                pool_wait_stats["wait_seconds_total"] += waited
+                pool_wait_stats["wait_seconds_max"] = max(pool_wait_stats["wait_seconds_max"], waited)
+
+def build_engine(url: str):
+    """Create the engine with the pool settings from the environment"""
+    connect_args = {}
+    if url.startswith('sqlite'):
+        connect_args = {"check_same_thread": False}
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            # Every session must see the same in-memory database
+            return create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+        pool_size=db_pool_size,
+        max_overflow=db_max_overflow,
+        pool_timeout=db_pool_timeout,
+        pool_pre_ping=db_pool_pre_ping,
+        pool_recycle=db_pool_recycle,
+    )
+
+if db_profile == 'local' and not (database_url or '').startswith('sqlite'):
+    database_url = local_database_url
+elif not database_url:
+    raise RuntimeError("DATABASE_URL is not set; set it, or DB_PROFILE=local to use a SQLite file")
+
+engine = build_engine(database_url)
+
+def pool_status() -> dict:
+    """Live connection pool statistics for the diagnostics endpoint"""
+    pool = engine.pool
+    status = {"profile": db_profile, "dialect": engine.dialect.name, "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        with _pool_wait_lock:
+            waits = dict(pool_wait_stats)
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": db_max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "pool_timeout": db_pool_timeout,
+            "pre_ping": db_pool_pre_ping,
+            "recycle_seconds": db_pool_recycle,
+            "checkouts": waits["checkouts"],
+            "checkout_timeouts": waits["timeouts"],
+            "avg_wait_ms": waits["wait_seconds_total"] / waits["checkouts"] * 1000 if waits["checkouts"] else 0.0,
+            "max_wait_ms": waits["wait_seconds_max"] * 1000,
+        })
+    return status
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -53,31 +141,31 @@ class Bureau(Base):
     
     id = Column(String, primary_key=True, index=True)
     ssn = Column(String, unique=True, index=True)  # Foreign key to SSN
-    dti = Column(String)
+    dti = Column(Numeric(14, 2), index=True)
     delinq_2yrs = Column(Integer)
     earliest_cr_line = Column(String)
-    fico_range_low = Column(Integer)
+    fico_range_low = Column(Integer, index=True)
     fico_range_high = Column(Integer)
     inq_last_6mths = Column(Integer)
     mths_since_last_delinq = Column(Integer)
     mths_since_last_record = Column(Integer)
     open_acc = Column(Integer)
     pub_rec = Column(Integer)
-    revol_bal = Column(String)
-    revol_util = Column(String)
+    revol_bal = Column(Numeric(14, 2))
+    revol_util = Column(Numeric(14, 2), index=True)
     total_acc = Column(Integer)
     initial_list_status = Column(String)
-    out_prncp = Column(String)
-    out_prncp_inv = Column(String)
-    total_pymnt = Column(String)
-    total_pymnt_inv = Column(String)
-    total_rec_prncp = Column(String)
-    total_rec_int = Column(String)
-    total_rec_late_fee = Column(String)
-    recoveries = Column(String)
-    collection_recovery_fee = Column(String)
+    out_prncp = Column(Numeric(14, 2))
+    out_prncp_inv = Column(Numeric(14, 2))
+    total_pymnt = Column(Numeric(14, 2))
+    total_pymnt_inv = Column(Numeric(14, 2))
+    total_rec_prncp = Column(Numeric(14, 2))
+    total_rec_int = Column(Numeric(14, 2))
+    total_rec_late_fee = Column(Numeric(14, 2))
+    recoveries = Column(Numeric(14, 2))
+    collection_recovery_fee = Column(Numeric(14, 2))
     last_pymnt_d = Column(String)
-    last_pymnt_amnt = Column(String)
+    last_pymnt_amnt = Column(Numeric(14, 2))
     next_pymnt_d = Column(String)
     last_credit_pull_d = Column(String)
     last_fico_range_high = Column(Integer)
@@ -86,33 +174,33 @@ class Bureau(Base):
     mths_since_last_major_derog = Column(Integer)
     policy_code = Column(String)
     application_type = Column(String)
-    annual_inc_joint = Column(String)
-    dti_joint = Column(String)
+    annual_inc_joint = Column(Numeric(14, 2))
+    dti_joint = Column(Numeric(14, 2))
     verification_status_joint = Column(String)
     acc_now_delinq = Column(Integer)
-    tot_coll_amt = Column(String)
-    tot_cur_bal = Column(String)
+    tot_coll_amt = Column(Numeric(14, 2))
+    tot_cur_bal = Column(Numeric(14, 2))
     open_acc_6m = Column(Integer)
     open_act_il = Column(Integer)
     open_il_12m = Column(Integer)
     open_il_24m = Column(Integer)
     mths_since_rcnt_il = Column(Integer)
-    total_bal_il = Column(String)
-    il_util = Column(String)
+    total_bal_il = Column(Numeric(14, 2))
+    il_util = Column(Numeric(14, 2))
     open_rv_12m = Column(Integer)
     open_rv_24m = Column(Integer)
-    max_bal_bc = Column(String)
-    all_util = Column(String)
-    total_rev_hi_lim = Column(String)
+    max_bal_bc = Column(Numeric(14, 2))
+    all_util = Column(Numeric(14, 2))
+    total_rev_hi_lim = Column(Numeric(14, 2))
     inq_fi = Column(Integer)
     total_cu_tl = Column(Integer)
     inq_last_12m = Column(Integer)
     acc_open_past_24mths = Column(Integer)
-    avg_cur_bal = Column(String)
-    bc_open_to_buy = Column(String)
-    bc_util = Column(String)
+    avg_cur_bal = Column(Numeric(14, 2))
+    bc_open_to_buy = Column(Numeric(14, 2))
+    bc_util = Column(Numeric(14, 2))
     chargeoff_within_12_mths = Column(Integer)
-    delinq_amnt = Column(String)
+    delinq_amnt = Column(Numeric(14, 2))
     mo_sin_old_il_acct = Column(Integer)
     mo_sin_old_rev_tl_op = Column(Integer)
     mo_sin_rcnt_rev_tl_op = Column(Integer)
@@ -136,22 +224,22 @@ class Bureau(Base):
     num_tl_30dpd = Column(Integer)
     num_tl_90g_dpd_24m = Column(Integer)
     num_tl_op_past_12m = Column(Integer)
-    pct_tl_nvr_dlq = Column(String)
-    percent_bc_gt_75 = Column(String)
+    pct_tl_nvr_dlq = Column(Numeric(14, 2))
+    percent_bc_gt_75 = Column(Numeric(14, 2))
     pub_rec_bankruptcies = Column(Integer)
     tax_liens = Column(Integer)
-    tot_hi_cred_lim = Column(String)
-    total_bal_ex_mort = Column(String)
-    total_bc_limit = Column(String)
-    total_il_high_credit_limit = Column(String)
-    revol_bal_joint = Column(String)
+    tot_hi_cred_lim = Column(Numeric(14, 2))
+    total_bal_ex_mort = Column(Numeric(14, 2))
+    total_bc_limit = Column(Numeric(14, 2))
+    total_il_high_credit_limit = Column(Numeric(14, 2))
+    revol_bal_joint = Column(Numeric(14, 2))
     sec_app_fico_range_low = Column(Integer)
     sec_app_fico_range_high = Column(Integer)
     sec_app_earliest_cr_line = Column(String)
     sec_app_inq_last_6mths = Column(Integer)
     sec_app_mort_acc = Column(Integer)
     sec_app_open_acc = Column(Integer)
-    sec_app_revol_util = Column(String)
+    sec_app_revol_util = Column(Numeric(14, 2))
     sec_app_open_act_il = Column(Integer)
     sec_app_num_rev_accts = Column(Integer)
     sec_app_chargeoff_within_12_mths = Column(Integer)
@@ -161,16 +249,16 @@ class Bureau(Base):
     hardship_reason = Column(String)
     hardship_status = Column(String)
     deferral_term = Column(Integer)
-    hardship_amount = Column(String)
+    hardship_amount = Column(Numeric(14, 2))
     hardship_start_date = Column(String)
     hardship_end_date = Column(String)
     payment_plan_start_date = Column(String)
     hardship_length = Column(Integer)
     hardship_dpd = Column(Integer)
     hardship_loan_status = Column(String)
-    orig_projected_additional_accrued_interest = Column(String)
-    hardship_payoff_balance_amount = Column(String)
-    hardship_last_payment_amount = Column(String)
+    orig_projected_additional_accrued_interest = Column(Numeric(14, 2))
+    hardship_payoff_balance_amount = Column(Numeric(14, 2))
+    hardship_last_payment_amount = Column(Numeric(14, 2))
     debt_settlement_flag = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -184,26 +272,60 @@ class KYC(Base):
 
 class DocumentUploadSave(Base):
     __tablename__ = "document_upload"
+    # Serves the latest-by-type lookups; on Postgres the INCLUDE makes them index-only scans
+    __table_args__ = (
+        Index("ix_document_upload_type_created_at", "document_type", "created_at",
+              postgresql_include=["extracted_number"]),
+    )
 
     id = Column(String, primary_key=True, index=True)
     document_type = Column(String)
     extracted_number = Column(String)
+    # sha256 of type + number; saving the same number again updates the existing row (see dedup.py)
+    content_hash = Column(String(64), unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class ApplicationUploadSave(Base):
     __tablename__ = "application_upload"
+    __table_args__ = (
+        Index("ix_application_upload_type_created_at", "application_type", "created_at"),
+    )
 
     id = Column(String, primary_key=True, index=True)
-    content = Column(String)
+    content = Column(CompressedText)
     application_type = Column(String)
+    # sha256 of type + content; saving the same document again updates the existing row (see dedup.py)
+    content_hash = Column(String(64), unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class UnderstatementResult(Base):
     __tablename__ = "understatement_result"
 
     id = Column(String, primary_key=True, index=True)
-    content = Column(String)
+    content = Column(CompressedText)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class LLMResultCacheEntry(Base):
+    __tablename__ = "llm_result_cache"
+
+    cache_key = Column(String, primary_key=True, index=True)
+    result = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class UploadJob(Base):
+    __tablename__ = "upload_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    job_type = Column(String)
+    document_type = Column(String)
+    filename = Column(String)
+    status = Column(String, index=True)
+    # "<hostname>:<pid>" of the worker process holding the job in memory
+    owner = Column(String, index=True)
+    result = Column(String)
+    error = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -0,0 +1,50 @@
+import uuid
+import hashlib
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import DocumentUploadSave, ApplicationUploadSave
+
+# Saved documents and applications are keyed by a hash of what was stored, so saving
+# the same thing again refreshes the existing row's created_at instead of adding a row.
+
+def content_hash(kind, value) -> str:
+    kind = getattr(kind, 'value', kind)
+    return hashlib.sha256(f"{kind}\x1f{value or ''}".encode("utf-8")).hexdigest()
+
+def _upsert(db: Session, model, values: dict):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(model)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model)
+    else:
+        raise ValueError(f"Upserts are not supported on the {dialect} dialect")
+    statement = statement.values(**values).on_conflict_do_update(
+        index_elements=["content_hash"], set_={"created_at": statement.excluded.created_at}
+    )
+    db.execute(statement)
+
+def upsert_document_upload(db: Session, document_type, extracted_number: str, created_at: datetime = None):
+    """Store an extracted license/SSN number once per (type, number); the caller commits"""
+    document_type = getattr(document_type, 'value', document_type)
+    _upsert(db, DocumentUploadSave, {
+        "id": str(uuid.uuid4()),
+        "document_type": document_type,
+        "extracted_number": extracted_number,
+        "content_hash": content_hash(document_type, extracted_number),
+        "created_at": created_at or datetime.now(),
+    })
+
+def upsert_application_upload(db: Session, application_type, content: str, created_at: datetime = None):
+    """Store a bank application/statement text once per (type, content); the caller commits"""
+    application_type = getattr(application_type, 'value', application_type)
+    _upsert(db, ApplicationUploadSave, {
+        "id": str(uuid.uuid4()),
+        "application_type": application_type,
+        "content": content,
+        "content_hash": content_hash(application_type, content),
+        "created_at": created_at or datetime.now(),
+    })
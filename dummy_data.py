@@ -1,5 +1,6 @@
 import uuid
 from datetime import date
+from decimal import Decimal
 from database import SessionLocal, DrivingLicense, SSNRecord, Bureau, KYC
 
 # Initialize dummy data
@@ -62,7 +63,7 @@ def init_dummy_data():
         Bureau(
             id=str(uuid.uuid4()),
             ssn="854659582",
-            dti="15.25",
+            dti=Decimal("15.25"),
             delinq_2yrs=0,
             earliest_cr_line="2010-01-01",
             fico_range_low=740,
@@ -72,21 +73,21 @@ def init_dummy_data():
             mths_since_last_record=None,
             open_acc=12,
             pub_rec=0,
-            revol_bal="8500.00",
-            revol_util="22.5",
+            revol_bal=Decimal("8500.00"),
+            revol_util=Decimal("22.5"),
             total_acc=18,
             initial_list_status="f",
-            out_prncp="0.00",
-            out_prncp_inv="0.00",
-            total_pymnt="15000.00",
-            total_pymnt_inv="15000.00",
-            total_rec_prncp="12000.00",
-            total_rec_int="3000.00",
-            total_rec_late_fee="0.00",
-            recoveries="0.00",
-            collection_recovery_fee="0.00",
+            out_prncp=Decimal("0.00"),
+            out_prncp_inv=Decimal("0.00"),
+            total_pymnt=Decimal("15000.00"),
+            total_pymnt_inv=Decimal("15000.00"),
+            total_rec_prncp=Decimal("12000.00"),
+            total_rec_int=Decimal("3000.00"),
+            total_rec_late_fee=Decimal("0.00"),
+            recoveries=Decimal("0.00"),
+            collection_recovery_fee=Decimal("0.00"),
             last_pymnt_d="2024-01-15",
-            last_pymnt_amnt="450.00",
+            last_pymnt_amnt=Decimal("450.00"),
             next_pymnt_d="2024-02-15",
             last_credit_pull_d="2024-01-10",
             last_fico_range_high=750,
@@ -99,29 +100,29 @@ def init_dummy_data():
             dti_joint=None,
             verification_status_joint=None,
             acc_now_delinq=0,
-            tot_coll_amt="0.00",
-            tot_cur_bal="85000.00",
+            tot_coll_amt=Decimal("0.00"),
+            tot_cur_bal=Decimal("85000.00"),
             open_acc_6m=0,
             open_act_il=2,
             open_il_12m=0,
             open_il_24m=1,
             mths_since_rcnt_il=8,
-            total_bal_il="25000.00",
-            il_util="65.5",
+            total_bal_il=Decimal("25000.00"),
+            il_util=Decimal("65.5"),
             open_rv_12m=1,
             open_rv_24m=2,
-            max_bal_bc="12000.00",
-            all_util="22.5",
-            total_rev_hi_lim="38000.00",
+            max_bal_bc=Decimal("12000.00"),
+            all_util=Decimal("22.5"),
+            total_rev_hi_lim=Decimal("38000.00"),
             inq_fi=1,
             total_cu_tl=2,
             inq_last_12m=3,
             acc_open_past_24mths=2,
-            avg_cur_bal="7083.33",
-            bc_open_to_buy="29500.00",
-            bc_util="22.5",
+            avg_cur_bal=Decimal("7083.33"),
+            bc_open_to_buy=Decimal("29500.00"),
+            bc_util=Decimal("22.5"),
             chargeoff_within_12_mths=0,
-            delinq_amnt="0.00",
+            delinq_amnt=Decimal("0.00"),
             mo_sin_old_il_acct=168,
             mo_sin_old_rev_tl_op=95,
             mo_sin_rcnt_rev_tl_op=8,
@@ -145,14 +146,14 @@ def init_dummy_data():
             num_tl_30dpd=0,
             num_tl_90g_dpd_24m=0,
             num_tl_op_past_12m=2,
-            pct_tl_nvr_dlq="100.0",
-            percent_bc_gt_75="0.0",
+            pct_tl_nvr_dlq=Decimal("100.0"),
+            percent_bc_gt_75=Decimal("0.0"),
             pub_rec_bankruptcies=0,
             tax_liens=0,
-            tot_hi_cred_lim="185000.00",
-            total_bal_ex_mort="33500.00",
-            total_bc_limit="38000.00",
-            total_il_high_credit_limit="50000.00",
+            tot_hi_cred_lim=Decimal("185000.00"),
+            total_bal_ex_mort=Decimal("33500.00"),
+            total_bc_limit=Decimal("38000.00"),
+            total_il_high_credit_limit=Decimal("50000.00"),
             revol_bal_joint=None,
             sec_app_fico_range_low=None,
             sec_app_fico_range_high=None,
@@ -0,0 +1,234 @@
+"""Generate large volumes of linked synthetic applicants for load testing.
+
+Every applicant gets one SSN record, one Bureau row, one KYC row and one
+driving license sharing the same name and address, so the lookup, list and
+/applicant endpoints all have realistic data to join. Bureau values follow
+LendingClub-like distributions. Rows go in with chunked executemany inserts,
+or with COPY on Postgres.
+
+    python generate_data.py --applicants 1000000
+    python generate_data.py --applicants 5000000 --method copy --chunk-size 50000
+    python generate_data.py --applicants 100000 --start 1000000   # append more
+"""
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from database import engine, SessionLocal, SSNRecord, Bureau, KYC, DrivingLicense
+from migrations import run_migrations
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Karen",
+               "Daniel", "Lisa", "Matthew", "Nancy", "Anthony", "Maria", "Mark", "Sandra", "Wei", "Priya"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+              "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Nguyen", "Patel", "Kim"]
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Pine St", "Elm St", "Washington Blvd", "Lake Rd",
+           "Hill St", "Park Ave", "Sunset Blvd", "River Rd", "Church St", "Highland Ave", "Mill Rd"]
+# (state, share of LendingClub loans, sample city, zip prefix)
+STATES = [("CA", 14.5, "Los Angeles", "900"), ("NY", 8.3, "Albany", "122"), ("TX", 8.2, "Austin", "787"),
+          ("FL", 7.1, "Orlando", "328"), ("IL", 3.9, "Chicago", "606"), ("NJ", 3.7, "Newark", "071"),
+          ("PA", 3.4, "Pittsburgh", "152"), ("OH", 3.3, "Columbus", "432"), ("GA", 3.3, "Atlanta", "303"),
+          ("VA", 2.9, "Richmond", "232"), ("NC", 2.8, "Raleigh", "276"), ("MI", 2.6, "Detroit", "482"),
+          ("MD", 2.4, "Baltimore", "212"), ("AZ", 2.4, "Phoenix", "850"), ("MA", 2.3, "Boston", "021"),
+          ("WA", 2.2, "Seattle", "981"), ("CO", 2.1, "Denver", "802"), ("MN", 1.8, "Minneapolis", "554"),
+          ("NV", 1.5, "Las Vegas", "891"), ("OR", 1.2, "Portland", "972")]
+STATE_WEIGHTS = [s[1] for s in STATES]
+
+# Nine-digit SSNs built from the applicant index: area 001-899 (never 666), group 01-99, serial 0001-9999
+SSN_AREAS = [area for area in range(1, 900) if area != 666]
+
+
+def ssn_for(index: int) -> str:
+    serial = index % 9999 + 1
+    group = (index // 9999) % 99 + 1
+    area = SSN_AREAS[index // (9999 * 99)]
+    return f"{area:03d}{group:02d}{serial:04d}"
+
+
+def license_for(index: int, state: str) -> str:
+    return f"{state[0]}{index:09d}"
+
+
+def money(value: float) -> Decimal:
+    return Decimal(f"{max(value, 0):.2f}")
+
+
+def month_string(day: date) -> str:
+    return day.strftime("%b-%Y")
+
+
+def generate_applicant(index: int, rng: random.Random, now: datetime):
+    """Build the linked SSN, license, KYC and Bureau rows for one applicant"""
+    ssn = ssn_for(index)
+    state, _, city, zip_prefix = rng.choices(STATES, weights=STATE_WEIGHTS)[0]
+    zip_code = f"{zip_prefix}{rng.randrange(100):02d}"
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    address = f"{rng.randrange(1, 9999)} {rng.choice(STREETS)}, {city}, {state} {zip_code}"
+    date_of_birth = date(1950, 1, 1) + timedelta(days=rng.randrange(0, 365 * 52))
+    issue_date = date(2015, 1, 1) + timedelta(days=rng.randrange(0, 365 * 9))
+
+    ssn_row = {"id": str(uuid.uuid4()), "ssn": ssn, "first_name": first_name, "last_name": last_name,
+               "address": address, "created_at": now}
+    license_row = {"id": str(uuid.uuid4()), "license_number": license_for(index, state), "first_name": first_name,
+                   "last_name": last_name, "date_of_birth": date_of_birth, "address": address,
+                   "issue_date": issue_date, "expiration_date": issue_date.replace(year=issue_date.year + 8),
+                   "sex": rng.choice("MF"), "created_at": now}
+    kyc_row = {"id": str(uuid.uuid4()), "ssn": ssn, "zip_code": zip_code, "addr_state": state}
+
+    # LendingClub-like credit profile
+    fico_low = min(845, max(660, int(rng.gauss(700, 32)) // 5 * 5))
+    last_fico_low = fico_low + rng.randrange(-30, 35, 5)
+    open_acc = max(1, int(rng.gauss(11.6, 5.5)))
+    total_acc = open_acc + max(0, int(rng.gauss(13, 9)))
+    revol_bal = rng.lognormvariate(9.3, 1.0)
+    revol_util = min(rng.betavariate(2.2, 2.3) * 100, 150)
+    credit_limit = revol_bal / max(revol_util / 100, 0.01)
+    tot_cur_bal = rng.lognormvariate(10.9, 1.3)
+    principal = rng.choice([5000, 8000, 10000, 12000, 15000, 20000, 25000, 35000])
+    paid_share = rng.random()
+    total_rec_prncp = principal * paid_share
+    total_rec_int = total_rec_prncp * rng.uniform(0.08, 0.25)
+    delinq_2yrs = rng.choices([0, 1, 2, 3], weights=[82, 12, 4, 2])[0]
+    pub_rec = rng.choices([0, 1, 2], weights=[85, 13, 2])[0]
+    earliest = date(1975, 1, 1) + timedelta(days=rng.randrange(0, 365 * 40))
+    last_payment = date(2024, 1, 1) + timedelta(days=rng.randrange(0, 365))
+    num_rev_accts = max(1, int(total_acc * rng.uniform(0.5, 0.8)))
+
+    bureau_row = {
+        "id": str(uuid.uuid4()), "ssn": ssn, "created_at": now,
+        "dti": money(min(rng.gammavariate(3.0, 6.2), 60)),
+        "delinq_2yrs": delinq_2yrs,
+        "earliest_cr_line": month_string(earliest),
+        "fico_range_low": fico_low, "fico_range_high": fico_low + 4,
+        "inq_last_6mths": rng.choices([0, 1, 2, 3, 4], weights=[55, 28, 10, 5, 2])[0],
+        "mths_since_last_delinq": rng.randrange(1, 120) if delinq_2yrs else None,
+        "mths_since_last_record": rng.randrange(1, 120) if pub_rec else None,
+        "open_acc": open_acc, "pub_rec": pub_rec,
+        "revol_bal": money(revol_bal), "revol_util": money(revol_util), "total_acc": total_acc,
+        "initial_list_status": rng.choices(["w", "f"], weights=[60, 40])[0],
+        "out_prncp": money(principal - total_rec_prncp), "out_prncp_inv": money(principal - total_rec_prncp),
+        "total_pymnt": money(total_rec_prncp + total_rec_int), "total_pymnt_inv": money(total_rec_prncp + total_rec_int),
+        "total_rec_prncp": money(total_rec_prncp), "total_rec_int": money(total_rec_int),
+        "total_rec_late_fee": money(0), "recoveries": money(0), "collection_recovery_fee": money(0),
+        "last_pymnt_d": month_string(last_payment), "last_pymnt_amnt": money(principal / 36 * rng.uniform(0.9, 1.3)),
+        "next_pymnt_d": month_string(last_payment + timedelta(days=31)),
+        "last_credit_pull_d": month_string(last_payment),
+        "last_fico_range_high": last_fico_low + 4, "last_fico_range_low": last_fico_low,
+        "collections_12_mths_ex_med": 0, "policy_code": "1", "application_type": "Individual",
+        "acc_now_delinq": 0, "tot_coll_amt": money(0), "tot_cur_bal": money(tot_cur_bal),
+        "total_rev_hi_lim": money(credit_limit), "avg_cur_bal": money(tot_cur_bal / open_acc),
+        "bc_open_to_buy": money(credit_limit - revol_bal), "bc_util": money(revol_util),
+        "all_util": money(revol_util), "max_bal_bc": money(revol_bal * rng.uniform(0.3, 0.9)),
+        "acc_open_past_24mths": rng.randrange(0, 10), "chargeoff_within_12_mths": 0, "delinq_amnt": money(0),
+        "mo_sin_old_rev_tl_op": (last_payment - earliest).days // 30,
+        "mo_sin_rcnt_rev_tl_op": rng.randrange(1, 60), "mo_sin_rcnt_tl": rng.randrange(1, 40),
+        "mort_acc": rng.choices([0, 1, 2, 3], weights=[45, 25, 18, 12])[0],
+        "mths_since_recent_inq": rng.randrange(0, 24),
+        "num_accts_ever_120_pd": 0, "num_actv_bc_tl": max(0, open_acc // 3), "num_actv_rev_tl": max(0, open_acc // 2),
+        "num_bc_sats": max(0, open_acc // 3), "num_bc_tl": max(0, num_rev_accts // 2), "num_il_tl": total_acc - num_rev_accts,
+        "num_op_rev_tl": max(0, open_acc - 2), "num_rev_accts": num_rev_accts,
+        "num_rev_tl_bal_gt_0": max(0, open_acc // 2), "num_sats": open_acc,
+        "num_tl_120dpd_2m": 0, "num_tl_30dpd": 0, "num_tl_90g_dpd_24m": 0, "num_tl_op_past_12m": rng.randrange(0, 5),
+        "pct_tl_nvr_dlq": money(100 - delinq_2yrs * rng.uniform(2, 8)),
+        "percent_bc_gt_75": money(rng.betavariate(1.2, 2.5) * 100),
+        "pub_rec_bankruptcies": min(pub_rec, 1), "tax_liens": 0,
+        "tot_hi_cred_lim": money(credit_limit + tot_cur_bal), "total_bal_ex_mort": money(revol_bal + tot_cur_bal * 0.2),
+        "total_bc_limit": money(credit_limit * 0.8), "total_il_high_credit_limit": money(tot_cur_bal * 0.3),
+        "hardship_flag": "N", "debt_settlement_flag": "N",
+    }
+    return ssn_row, license_row, kyc_row, bureau_row
+
+
+def insert_chunk(db, tables):
+    """Insert one chunk per table with executemany"""
+    for model, rows in tables:
+        db.execute(insert(model), rows)
+    db.commit()
+
+
+def copy_chunk(connection, tables):
+    """Stream one chunk per table through Postgres COPY"""
+    with connection.cursor() as cursor:
+        for model, rows in tables:
+            columns = list(rows[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([row[column] for column in columns] for row in rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+    connection.commit()
+
+
+def generate(applicants: int, start: int = 0, chunk_size: int = 10000, method: str = "auto", seed: int = 42) -> dict:
+    """Generate and load ``applicants`` linked applicants; returns row counts and timings"""
+    if start + applicants > len(SSN_AREAS) * 99 * 9999:
+        raise ValueError("not enough distinct SSNs for that many applicants")
+    if method == "auto":
+        method = "copy" if engine.dialect.name == "postgresql" else "insert"
+    if method == "copy" and engine.dialect.name != "postgresql":
+        raise ValueError("--method copy needs a Postgres DATABASE_URL")
+
+    rng = random.Random(seed + start)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    loaded = 0
+
+    raw_connection = engine.raw_connection() if method == "copy" else None
+    db = SessionLocal() if method == "insert" else None
+    try:
+        for chunk_start in range(start, start + applicants, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, start + applicants)
+            ssn_rows, license_rows, kyc_rows, bureau_rows = zip(
+                *(generate_applicant(index, rng, now) for index in range(chunk_start, chunk_end))
+            )
+            tables = [(SSNRecord, ssn_rows), (DrivingLicense, license_rows), (KYC, kyc_rows), (Bureau, bureau_rows)]
+            if method == "copy":
+                copy_chunk(raw_connection, tables)
+            else:
+                insert_chunk(db, [(model, list(rows)) for model, rows in tables])
+
+            loaded = chunk_end - start
+            elapsed = time.perf_counter() - started
+            print(f"{loaded:>10,} applicants loaded ({loaded / elapsed:,.0f}/s)")
+    finally:
+        if raw_connection is not None:
+            raw_connection.close()
+        if db is not None:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    return {"applicants": loaded, "rows": loaded * 4, "method": method, "seconds": elapsed,
+            "applicants_per_second": loaded / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applicants", type=int, default=100000, help="number of applicants to create")
+    parser.add_argument("--start", type=int, default=0,
+                        help="index of the first applicant; use the previous total to append without SSN clashes")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--method", choices=["auto", "insert", "copy"], default="auto",
+                        help="auto uses COPY on Postgres and chunked inserts elsewhere")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    summary = generate(args.applicants, args.start, args.chunk_size, args.method, args.seed)
+    print(f"Loaded {summary['applicants']:,} applicants ({summary['rows']:,} rows) with {summary['method']} "
+          f"in {summary['seconds']:.1f}s ({summary['applicants_per_second']:,.0f} applicants/s)")
+    print("Restart the API, or wait out LOOKUP_CACHE_NEGATIVE_TTL_SECONDS, so cached misses pick up the new rows")
+
+
+if __name__ == "__main__":
+    main()
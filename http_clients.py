@@ -0,0 +1,62 @@
+import os
+
+import httpx
+
+
+def _upstream_settings(prefix: str, max_connections: int, connect_timeout: float, read_timeout: float) -> dict:
+    """Pool and timeout settings for one upstream, overridable with ``<PREFIX>_*`` environment variables"""
+    return {
+        "max_connections": int(os.environ.get(f'{prefix}_MAX_CONNECTIONS', str(max_connections))),
+        "max_keepalive_connections": int(os.environ.get(f'{prefix}_MAX_KEEPALIVE', str(max_connections))),
+        "keepalive_expiry": float(os.environ.get(f'{prefix}_KEEPALIVE_EXPIRY', '30')),
+        "connect_timeout": float(os.environ.get(f'{prefix}_CONNECT_TIMEOUT', str(connect_timeout))),
+        "read_timeout": float(os.environ.get(f'{prefix}_READ_TIMEOUT', str(read_timeout))),
+        "pool_timeout": float(os.environ.get(f'{prefix}_POOL_TIMEOUT', '30')),
+    }
+
+UPSTREAM_SETTINGS = {
+    # A Langflow run can take many minutes, but connecting should not
+    "langflow": _upstream_settings('LANGFLOW', max_connections=10, connect_timeout=10, read_timeout=900),
+    "scoring": _upstream_settings('SCORING', max_connections=20, connect_timeout=10, read_timeout=60),
+}
+
+def build_timeout(settings: dict, read_timeout: float = None) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings["connect_timeout"],
+        read=settings["read_timeout"] if read_timeout is None else read_timeout,
+        write=settings["connect_timeout"],
+        pool=settings["pool_timeout"],
+    )
+
+def build_client(name: str, **kwargs) -> httpx.AsyncClient:
+    settings = UPSTREAM_SETTINGS[name]
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    return httpx.AsyncClient(limits=limits, timeout=build_timeout(settings), **kwargs)
+
+
+class UpstreamClients:
+    """One pooled keep-alive client per upstream, opened at startup and closed at shutdown"""
+
+    def __init__(self):
+        self.clients = {}
+
+    async def start(self):
+        for name in UPSTREAM_SETTINGS:
+            if name not in self.clients:
+                self.clients[name] = build_client(name)
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients = {}
+
+    def get(self, name: str):
+        """The shared client for ``name``, or None before startup"""
+        return self.clients.get(name)
+
+
+upstream_clients = UpstreamClients()
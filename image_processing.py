@@ -0,0 +1,69 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+
+from image_worker import preprocess_image
+from metrics import track_stage, image_bytes
+
+# Images are normalised before they reach the vision model: EXIF orientation applied,
+# downscaled to IMAGE_MAX_EDGE pixels and re-encoded as JPEG in a process pool.
+image_preprocess = os.environ.get('IMAGE_PREPROCESS', 'true').lower() == 'true'
+image_max_edge = int(os.environ.get('IMAGE_MAX_EDGE', '1600'))
+image_grayscale = os.environ.get('IMAGE_GRAYSCALE', 'false').lower() == 'true'
+image_jpeg_quality = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+image_preprocess_timeout = float(os.environ.get('IMAGE_PREPROCESS_TIMEOUT', '30'))
+image_workers = int(os.environ.get('IMAGE_WORKERS', str(min(4, os.cpu_count() or 1))))
+_image_pool = None
+
+# Formats the vision model accepts as-is; anything else is always converted
+PASSTHROUGH_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all image preprocessing, created on first use"""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=image_workers, mp_context=multiprocessing.get_context('spawn'))
+    return _image_pool
+
+def shutdown_image_pool():
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _image_pool = None
+
+async def prepare_image_async(data: bytes, file_extension: str, filename: str = '') -> tuple:
+    """Return ``(image_bytes, extension)`` ready to send to the vision model"""
+
+    if not image_preprocess and file_extension in PASSTHROUGH_EXTENSIONS:
+        return data, file_extension
+
+    # With preprocessing off, other formats are still converted, just not resized or recoloured
+    max_edge = image_max_edge if image_preprocess else 0
+    grayscale = image_grayscale and image_preprocess
+
+    loop = asyncio.get_running_loop()
+    try:
+        with track_stage("image_preprocess"):
+            processed, info = await asyncio.wait_for(
+                loop.run_in_executor(get_image_pool(), preprocess_image, data, max_edge, grayscale, image_jpeg_quality),
+                timeout=image_preprocess_timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=400, detail=f"Error reading image: timed out after {image_preprocess_timeout}s")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error reading image: {str(e)}")
+
+    # A small, already compact JPEG/PNG can come out larger after re-encoding
+    if len(processed) >= len(data) and file_extension in PASSTHROUGH_EXTENSIONS and info["size"] == info["original_size"]:
+        processed, extension = data, file_extension
+    else:
+        extension = '.jpg'
+
+    image_bytes.inc(len(data), direction="in")
+    image_bytes.inc(len(processed), direction="out")
+    print(f"Preprocessed {filename or 'image'}: {info['original_size'][0]}x{info['original_size'][1]} "
+          f"{len(data)} bytes -> {info['size'][0]}x{info['size'][1]} {len(processed)} bytes "
+          f"in {info['seconds'] * 1000:.0f}ms")
+    return processed, extension
@@ -0,0 +1,38 @@
+import io
+import time
+from PIL import Image, ImageOps
+
+# Kept free of application imports so spawned preprocessing workers start quickly.
+
+def preprocess_image(data: bytes, max_edge: int, grayscale: bool, quality: int) -> tuple:
+    """Orient, downscale and re-encode an image as JPEG.
+
+    Returns ``(jpeg_bytes, info)`` where ``info`` records the original and
+    final dimensions and the time spent.
+    """
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    original_size = image.size
+    if max_edge and image.format == "JPEG":
+        # Let the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding instead of resizing the full frame
+        image.draft("L" if grayscale else "RGB", (max_edge, max_edge))
+    image.seek(0)  # first frame of animated GIFs and multi-page TIFFs
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    image = image.convert("L" if grayscale else "RGB")
+
+    if max_edge and max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue(), {
+        "original_size": original_size,
+        "size": image.size,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,163 @@
+import os
+import json
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from database import SessionLocal, UploadJob
+
+upload_job_workers = int(os.environ.get('UPLOAD_JOB_WORKERS', '4'))
+upload_job_queue_size = int(os.environ.get('UPLOAD_JOB_QUEUE_SIZE', '1000'))
+# Jobs owned by a worker on another host are only presumed lost once they have not moved for this long
+upload_job_stale_seconds = float(os.environ.get('UPLOAD_JOB_STALE_SECONDS', '3600'))
+
+
+class UploadJobQueue:
+    """In-process job queue for document uploads.
+
+    Job state lives in the ``upload_jobs`` table so any worker can answer
+    ``GET /jobs/{id}``; the uploaded bytes are held in memory only, which keeps
+    the queue free of any external broker. Each job records the process that
+    owns it; on start a worker fails the queued/running jobs of processes on
+    its host that are gone, and those of other hosts once they are stale.
+    """
+
+    def __init__(self, workers: int, maxsize: int):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.handlers = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue = None
+        self._tasks = []
+
+    def register(self, job_type: str, handler):
+        """``handler(filename, data, document_type, db)`` must return a pydantic model"""
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        self._fail_interrupted_jobs()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _owner_is_gone(self, owner: str) -> bool:
+        """Whether the process that owned a job can no longer be running it"""
+        host, _, pid = (owner or "").rpartition(":")
+        if not host or not pid.isdigit():
+            # Jobs recorded before owners were tracked
+            return True
+        if host != socket.gethostname():
+            return False
+        if owner == self.owner:
+            # A restarted container can reuse the pid; this process has not taken any job yet
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def _fail_interrupted_jobs(self):
+        db = SessionLocal()
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=upload_job_stale_seconds)
+            interrupted = [
+                job.id for job in db.query(UploadJob.id, UploadJob.owner, UploadJob.updated_at)
+                .filter(UploadJob.status.in_(["queued", "running"]))
+                if self._owner_is_gone(job.owner) or (job.updated_at and job.updated_at < stale_before)
+            ]
+            if interrupted:
+                db.query(UploadJob).filter(UploadJob.id.in_(interrupted)).update(
+                    {"status": "failed", "error": "Interrupted by a server restart", "updated_at": datetime.utcnow()},
+                    synchronize_session=False,
+                )
+                db.commit()
+                print(f"Marked {len(interrupted)} interrupted upload jobs as failed")
+        finally:
+            db.close()
+
+    async def submit(self, job_type: str, filename: str, data: bytes, document_type) -> str:
+        """Record a queued job and hand it to the worker pool"""
+        if self._queue is None:
+            raise HTTPException(status_code=503, detail="Job queue is not running")
+        if self._queue.full():
+            raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+
+        document_type = getattr(document_type, 'value', document_type)
+        job_id = str(uuid.uuid4())
+        db = SessionLocal()
+        try:
+            db.add(UploadJob(id=job_id, job_type=job_type, document_type=document_type, filename=filename,
+                             status="queued", owner=self.owner, created_at=datetime.utcnow(), updated_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+        self._queue.put_nowait((job_id, job_type, filename, data, document_type))
+        return job_id
+
+    def _update(self, db, job_id: str, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        db.query(UploadJob).filter(UploadJob.id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(*job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed (e.g. the database is down); keep this worker for the next job
+                print(f"Couldn't record the outcome of upload job {job[0]} due to: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, job_type: str, filename: str, data: bytes, document_type):
+        db = SessionLocal()
+        try:
+            self._update(db, job_id, status="running")
+            result = await self.handlers[job_type](filename, data, document_type, db)
+            self._update(db, job_id, status="succeeded",
+                         result=result.model_dump_json() if result is not None else None)
+        except asyncio.CancelledError:
+            raise
+        except HTTPException as e:
+            db.rollback()
+            self._update(db, job_id, status="failed", error=str(e.detail))
+        except Exception as e:
+            db.rollback()
+            self._update(db, job_id, status="failed", error=str(e))
+        finally:
+            db.close()
+
+    @staticmethod
+    def get(db, job_id: str):
+        job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+        if not job:
+            return None
+        return {
+            "id": job.id,
+            "job_type": job.job_type,
+            "document_type": job.document_type,
+            "filename": job.filename,
+            "status": job.status,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+        }
+
+
+upload_job_queue = UploadJobQueue(upload_job_workers, upload_job_queue_size)
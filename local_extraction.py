@@ -0,0 +1,140 @@
+import os
+import re
+
+from metrics import local_extraction_total
+
+# Deterministic first pass over text PDFs: a well-formed, unambiguous SSN or license
+# number on text that reads like the card itself is accepted without calling the LLM.
+local_extraction_enabled = os.environ.get('LOCAL_EXTRACTION_ENABLED', 'true').lower() == 'true'
+local_extraction_min_confidence = float(os.environ.get('LOCAL_EXTRACTION_MIN_CONFIDENCE', '0.9'))
+
+SSN_KEYWORDS = re.compile(r"social\s+security|\bssn\b|\bssa\b", re.IGNORECASE)
+LICENSE_KEYWORDS = re.compile(r"driver'?s?\s+licen[cs]e|driving\s+licen[cs]e|\bDL\b|\bDLN\b|\bCDL\b", re.IGNORECASE)
+
+SSN_FORMATTED = re.compile(r"(?<![\d-])(\d{3})[- ](\d{2})[- ](\d{4})(?![\d-])")
+SSN_LABELLED = re.compile(r"(?:\bSSN|social\s+security\s+(?:number|no\.?|#))\s*[:#]?\s*(\d{9})(?!\d)", re.IGNORECASE)
+# Numbers the SSA has voided or that only ever appear in samples
+INVALID_SSNS = {"078051120", "219099999", "123456789"}
+
+LICENSE_LABELLED = re.compile(
+    r"(?:\bDLN|\bDL|\bLIC|licen[cs]e)\s*(?:number|no\.?|#|num)?\s*[:#.]?\s*([A-Z0-9][A-Z0-9-]{4,18}[A-Z0-9])(?![A-Z0-9])",
+    re.IGNORECASE,
+)
+
+# Per-state license number formats (AAMVA); states not listed fall back to the generic shape check
+STATE_LICENSE_PATTERNS = {
+    "AZ": r"[A-Z]\d{8}|\d{9}", "CA": r"[A-Z]\d{7}", "CO": r"\d{9}|[A-Z]\d{3,6}|[A-Z]{2}\d{2,5}",
+    "FL": r"[A-Z]\d{12}", "GA": r"\d{7,9}", "IL": r"[A-Z]\d{11,12}", "MA": r"[A-Z]\d{8}|\d{9}",
+    "MD": r"[A-Z]\d{12}", "MI": r"[A-Z]\d{10}|[A-Z]\d{12}", "MN": r"[A-Z]\d{12}", "NC": r"\d{1,12}",
+    "NJ": r"[A-Z]\d{14}", "NV": r"\d{9,10}|\d{12}|X\d{8}", "NY": r"[A-Z]\d{7}|[A-Z]\d{18}|\d{8,9}|\d{16}|[A-Z]{8}",
+    "OH": r"[A-Z]\d{4,8}|[A-Z]{2}\d{3,7}|\d{8}", "OR": r"\d{1,9}|[A-Z]\d{6}|[A-Z]{2}\d{5}",
+    "PA": r"\d{8}", "TX": r"\d{7,8}", "VA": r"[A-Z]\d{8,11}|\d{9}", "WA": r"WDL[A-Z0-9]{9}|[A-Z*]{7}[A-Z0-9*]{5}",
+}
+STATE_LICENSE_PATTERNS = {state: re.compile(rf"(?:{pattern})") for state, pattern in STATE_LICENSE_PATTERNS.items()}
+GENERIC_LICENSE = re.compile(r"(?=.*\d)[A-Z0-9]{6,18}")
+STATE_NAMES = {
+    "ARIZONA": "AZ", "CALIFORNIA": "CA", "COLORADO": "CO", "FLORIDA": "FL", "GEORGIA": "GA", "ILLINOIS": "IL",
+    "MASSACHUSETTS": "MA", "MARYLAND": "MD", "MICHIGAN": "MI", "MINNESOTA": "MN", "NORTH CAROLINA": "NC",
+    "NEW JERSEY": "NJ", "NEVADA": "NV", "NEW YORK": "NY", "OHIO": "OH", "OREGON": "OR", "PENNSYLVANIA": "PA",
+    "TEXAS": "TX", "VIRGINIA": "VA", "WASHINGTON": "WA",
+}
+STATE_NAME_PATTERN = re.compile(r"\b(" + "|".join(sorted(STATE_NAMES, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+
+# Wording printed on the cards themselves; without it the document type is left to the LLM
+CARD_EVIDENCE = {
+    "ssn": re.compile(r"social\s+security\s+(?:administration|card)|this\s+number\s+has\s+been\s+established",
+                      re.IGNORECASE),
+    "driving_license": re.compile(r"\bDOB\b|date\s+of\s+birth|\bEXP\b|expires|expiration|\bclass\b|\bISS\b"
+                                  r"|restrictions?|endorsements?", re.IGNORECASE),
+}
+
+# Wording of documents that quote an SSN or license number without being the card itself
+# (tax forms, statements, applications); their numbers are left to the LLM
+OTHER_DOCUMENT_MARKERS = re.compile(
+    r"\bW-?2\b|\b1099\b|\b1040\b|wage\s+and\s+tax|\bemploye[er]\b|\bpayroll\b|\bpay\s*stub\b|statement"
+    r"|\bbalance\b|account\s+(?:number|no\b|#)|\btransactions?\b|\bapplica(?:nt|tion)\b|\binvoice\b",
+    re.IGNORECASE,
+)
+
+
+def is_valid_ssn(ssn: str) -> bool:
+    """SSA structural rules: no 000/666/9xx area, 00 group or 0000 serial"""
+    if len(ssn) != 9 or not ssn.isdigit() or ssn in INVALID_SSNS:
+        return False
+    area, group, serial = ssn[:3], ssn[3:5], ssn[5:]
+    return area not in ("000", "666") and area[0] != "9" and group != "00" and serial != "0000"
+
+
+def extract_ssn(content: str) -> tuple:
+    """Return ``(ssn, confidence)``; confidence is 0 when nothing usable was found"""
+    if not SSN_KEYWORDS.search(content):
+        return "", 0.0
+
+    formatted = {"".join(match.groups()) for match in SSN_FORMATTED.finditer(content)}
+    labelled = {match.group(1) for match in SSN_LABELLED.finditer(content)}
+    candidates = {ssn for ssn in formatted | labelled if is_valid_ssn(ssn)}
+
+    if len(candidates) != 1:
+        # Several different numbers on one card means we cannot tell which one is the SSN
+        return "", 0.3 if candidates else 0.0
+    ssn = candidates.pop()
+    confidence = 0.95 if ssn in formatted else 0.9
+    if LICENSE_KEYWORDS.search(content):
+        confidence -= 0.2
+    return ssn, confidence
+
+
+def _document_state(content: str) -> str:
+    match = STATE_NAME_PATTERN.search(content)
+    return STATE_NAMES[match.group(1).upper()] if match else ""
+
+
+def extract_license_number(content: str) -> tuple:
+    """Return ``(license_number, confidence)``; confidence is 0 when nothing usable was found"""
+    if not LICENSE_KEYWORDS.search(content):
+        return "", 0.0
+
+    state = _document_state(content)
+    state_pattern = STATE_LICENSE_PATTERNS.get(state)
+    candidates = set()
+    for match in LICENSE_LABELLED.finditer(content):
+        number = match.group(1).replace("-", "").upper()
+        if GENERIC_LICENSE.fullmatch(number):
+            candidates.add(number)
+
+    if state_pattern is not None:
+        state_matches = {number for number in candidates if state_pattern.fullmatch(number)}
+        if len(state_matches) == 1:
+            return state_matches.pop(), 0.95
+        if state_matches:
+            return "", 0.3
+    if len(candidates) == 1:
+        # Right shape but the issuing state's format could not be confirmed
+        return candidates.pop(), 0.8 if state_pattern is None else 0.5
+    return "", 0.3 if candidates else 0.0
+
+
+def extract_locally(content: str, document_type) -> tuple:
+    """Try the deterministic extractors on PDF text.
+
+    Returns ``(number, confidence)``. ``number`` is empty unless the confidence
+    clears LOCAL_EXTRACTION_MIN_CONFIDENCE and the text reads like the card
+    itself (card wording present, nothing from other documents); a non-empty
+    number stands in for the LLM's verification and extraction.
+    """
+    document_type = getattr(document_type, 'value', document_type)
+    if not local_extraction_enabled or not content:
+        return "", 0.0
+
+    if document_type == "ssn":
+        number, confidence = extract_ssn(content)
+    elif document_type == "driving_license":
+        number, confidence = extract_license_number(content)
+    else:
+        return "", 0.0
+
+    if number and (not CARD_EVIDENCE[document_type].search(content) or OTHER_DOCUMENT_MARKERS.search(content)):
+        number, confidence = "", min(confidence, 0.3)
+    handled = bool(number) and confidence >= local_extraction_min_confidence
+    local_extraction_total.inc(document_type=document_type, outcome="handled" if handled else "fallback")
+    return (number if handled else ""), confidence
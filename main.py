@@ -2,22 +2,38 @@ import os
 import json
 import uuid
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
+import time
 import requests
+import httpx
 import asyncio
 
 from database import *
 from schemas import *
 from utils import *
+from cache import llm_result_cache, lookup_cache
+from pipeline import *
+from jobs import upload_job_queue
+from bulk import collect_bulk_items, stream_bulk_results
+from scoring import poll_case_profile
+from http_clients import upstream_clients, build_client
+from pagination import ListParams, list_records, keyset_page
+from migrations import run_migrations
+from applicant import load_applicant_profile
+from bureau_import import detect_format, import_bureau_file
+from dedup import upsert_document_upload, upsert_application_upload
+from image_processing import shutdown_image_pool
+from metrics import registry, metric_labels, track_stage, http_request_duration
 from dummy_data import init_dummy_data
 import cloudinary
 from cloudinary.utils import cloudinary_url
@@ -41,6 +57,7 @@ app = FastAPI(title="Document Processing API", version="1.0.0")
 # Base.metadata.drop_all(bind=engine)
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +67,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_duration.observe(time.perf_counter() - start, method=request.method,
+                                  route=getattr(route, "path", "unmatched"), status=response.status_code)
+    return response
+
 cloudinary.config( 
     cloud_name = "dt0ov4rhl", 
     api_key = "569273936667352", 
@@ -63,81 +89,25 @@ cloudinary.config(
 async def upload_personal_documents(
     file: UploadFile = File(...),
     document_type: ApplicationDocumentType = Query(..., description="Type of personal document: driving_license or ssn"),
+    async_mode: bool = Query(False, description="Queue the upload and return 202 with a job id to poll at /jobs/{id}"),
     db: Session = Depends(get_db)
 ):
     """Upload and process a document (image or PDF) to extract license/SSN number"""
     
     # Validate file type
-    allowed_extensions = {'.pdf', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'}
-    file_extension = Path(file.filename).suffix.lower()
-    
-    if file_extension not in allowed_extensions:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type {file_extension} not allowed. Allowed types: {', '.join(allowed_extensions)}"
-        )
+    validate_extension(file.filename, PERSONAL_DOCUMENT_EXTENSIONS)
     
     # Save file locally
     # file_path = save_file(file)
+
+    if async_mode:
+        job_id = await upload_job_queue.submit("personal", file.filename, await file.read(), document_type)
+        return job_accepted(job_id)
     
     try:
-        # Extract content based on file type
-        if file_extension == '.pdf':
-            file.file.seek(0)
-            content = extract_text_from_pdf_stream(file.file)
-            image_url = ''
-            # content = extract_text_from_pdf(file)
-            verified = verify_document(document_type, 'text', content, image_url)
-            if verified == str('True'):
-                extracted_number = extract_document_with_llm(content, 'text', image_url)
-            elif verified == str('False'):
-                print('Failed verification')
-                return DocumentUploadMessage(
-                        success=False,
-                        message=f"Couldn't Upload the document: {document_type}",
-                        document_type=document_type,
-                        extracted_number="",
-                        file_path=''
-                    )
-        elif file_extension in ['.jpg', '.png', '.jpeg']:
-            content = ''
-            # image_url = f"https://ac7ebdf3091e.ngrok-free.app/{file.filename}" 
-            upload_result = cloudinary_upload(file.file, resource_type="image")
-            image_url = upload_result['secure_url']
-            print(f'The image URL obtained: {image_url}')
-            verified = verify_document(document_type, 'image', content, image_url)
-            if verified == str('True'):
-                extracted_number = extract_document_with_llm(content, 'image', image_url)
-
-            elif verified == str('False'):
-                print('Failed verification')
-                return DocumentUploadMessage(
-                        success=False,
-                        message=f"Couldn't Upload the document: {document_type}",
-                        document_type=document_type,
-                        extracted_number="",
-                        file_path=image_url
-                    )               
-
-        print(f'The number extracted: {extracted_number}')
-        
-        new_license_number = DocumentUploadSave(id = str(uuid.uuid4()),
-                                                document_type = document_type, 
-                                                extracted_number = extracted_number, 
-                                                created_at = datetime.now())
-
-        db.add(new_license_number)
-        db.commit()
-
-        print('Document Saved Successfully')
-
-        return DocumentUploadMessage(
-            success=True,
-            message=f"Successfully extracted {document_type} number",
-            document_type=document_type,
-            extracted_number=extracted_number,
-            file_path=''
-        )
+        data = await file.read()
+        with metric_labels(endpoint="upload_personal_documents", document_type=document_type):
+            return await process_personal_document(file.filename, data, document_type, db)
         
     except Exception as e:
         import traceback
@@ -148,77 +118,82 @@ async def upload_personal_documents(
 @app.post("/upload_bank_documents")
 async def upload_bank_documents(file: UploadFile = File(...), 
                                 application_type: StatementDocumentType  = Query(..., description="Type of bank document: bank_application or bank_statement"),
+                                async_mode: bool = Query(False, description="Queue the upload and return 202 with a job id to poll at /jobs/{id}"),
                                 db: Session = Depends(get_db)):
 
     # Validate file type
-    allowed_extensions = {'.pdf'}
-    file_extension = Path(file.filename).suffix.lower()
-    
-    if file_extension not in allowed_extensions:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type {file_extension} not allowed. Allowed types: {', '.join(allowed_extensions)}"
-        )
+    validate_extension(file.filename, BANK_DOCUMENT_EXTENSIONS)
     
     # Save file locally
     # file_path = save_file(file)
 
+    if async_mode:
+        job_id = await upload_job_queue.submit("bank", file.filename, await file.read(), application_type)
+        return job_accepted(job_id)
+
     try:
 
-        file.file.seek(0)
+        data = await file.read()
+
+        with metric_labels(endpoint="upload_bank_documents", document_type=application_type):
+            return await process_bank_document(data, application_type, db)
 
-        # content = extract_text_from_pdf(file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        content = extract_text_from_pdf_stream(file.file)
+def job_accepted(job_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content=JobAcceptedResponse(job_id=job_id, status="queued", status_url=f"/jobs/{job_id}").model_dump(),
+    )
 
-        image_url = ''
+async def run_personal_upload_job(filename, data, document_type, db):
+    with metric_labels(endpoint="upload_personal_documents_job", document_type=document_type):
+        return await process_personal_document(filename, data, ApplicationDocumentType(document_type), db)
 
-        verified = verify_document(application_type, 'text', content, image_url)
+async def run_bank_upload_job(filename, data, document_type, db):
+    with metric_labels(endpoint="upload_bank_documents_job", document_type=document_type):
+        return await process_bank_document(data, StatementDocumentType(document_type), db)
 
-        if verified == str('True'):
-            try:
-                new_bank_document = ApplicationUploadSave(id = str(uuid.uuid4()),
-                                                            content = content,
-                                                            application_type=application_type,
-                                                            created_at = datetime.now())
+upload_job_queue.register("personal", run_personal_upload_job)
+upload_job_queue.register("bank", run_bank_upload_job)
 
-                db.add(new_bank_document)
-                db.commit()
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, db: Session = Depends(get_db)):
+    """Get the status, and once finished the result, of a queued upload"""
 
-                print('Document Saved Successfully')
+    job = upload_job_queue.get(db, job_id)
 
-                return ApplicationUploadMessage(
-                    success=True,
-                    message=f"Successfully extracted {application_type}",
-                    application_type=application_type,
-                    content=content,
-                    file_path=''
-                )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-            except Exception as e:
-                raise f'Couldnt upload file due to: {e}'
-            
-        elif verified == str('False'):
-            return ApplicationUploadMessage(
-                    success=False,
-                    message=f"Couldn't Upload the document: {application_type}",
-                    application_type=application_type,
-                    content="",
-                    file_path=''
-                )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return job
+
+@app.post("/bulk_upload_documents")
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(..., description="Documents and/or ZIP archives of documents"),
+    manifest: Optional[str] = Form(None, description='JSON object mapping each file name to its document type, e.g. {"dl_001.jpg": "driving_license"}'),
+):
+    """Run a batch of documents through the upload pipeline, streaming one NDJSON result per file"""
+
+    uploads = [(file.filename, await file.read()) for file in files]
+    items, document_types = collect_bulk_items(uploads, manifest)
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No documents found in the upload")
+
+    return StreamingResponse(stream_bulk_results(items, document_types), media_type="application/x-ndjson")
+
+def load_record(query, schema):
+    """First row of ``query`` as a detached response model, or None"""
+    record = query.first()
+    return schema.model_validate(record, from_attributes=True) if record else None
 
 @app.post("/save-driving-license/{extracted_number}")
 async def save_driving_license(extracted_number: str, db: Session = Depends(get_db)):
 
     try:
-        new_license_number = DocumentUploadSave(id = str(uuid.uuid4()),
-                                                    document_type = "driving_license", 
-                                                    extracted_number = extracted_number, 
-                                                    created_at = datetime.now())
-
-        db.add(new_license_number)
+        upsert_document_upload(db, "driving_license", extracted_number)
         db.commit()
 
         print('Document Saved Successfully')
@@ -232,9 +207,8 @@ async def save_driving_license(extracted_number: str, db: Session = Depends(get_
 async def get_driving_license(license_number: str, db: Session = Depends(get_db)):
     """Get driving license details by license number"""
     
-    license_record = db.query(DrivingLicense).filter(
-        DrivingLicense.license_number == license_number
-    ).first()
+    license_record = lookup_cache.get_or_load("driving_license", license_number, lambda: load_record(
+        db.query(DrivingLicense).filter(DrivingLicense.license_number == license_number), DrivingLicenseResponse))
     
     if not license_record:
         raise HTTPException(status_code=404, detail="Driving license not found")
@@ -245,12 +219,7 @@ async def get_driving_license(license_number: str, db: Session = Depends(get_db)
 async def save_ssn(extracted_number: str, db: Session = Depends(get_db)):
 
     try:
-        new_license_number = DocumentUploadSave(id = str(uuid.uuid4()),
-                                                    document_type = "ssn", 
-                                                    extracted_number = extracted_number, 
-                                                    created_at = datetime.now())
-
-        db.add(new_license_number)
+        upsert_document_upload(db, "ssn", extracted_number)
         db.commit()
 
         print('Document Saved Successfully')
@@ -264,7 +233,8 @@ async def save_ssn(extracted_number: str, db: Session = Depends(get_db)):
 async def get_ssn_record(ssn: str, db: Session = Depends(get_db)):
     """Get SSN record details by SSN"""
     
-    ssn_record = db.query(SSNRecord).filter(SSNRecord.ssn == ssn).first()
+    ssn_record = lookup_cache.get_or_load("ssn", ssn, lambda: load_record(
+        db.query(SSNRecord).filter(SSNRecord.ssn == ssn), SSNResponse))
     
     if not ssn_record:
         raise HTTPException(status_code=404, detail="SSN record not found")
@@ -275,12 +245,7 @@ async def get_ssn_record(ssn: str, db: Session = Depends(get_db)):
 async def save_bank_application(request: BankApplicationSchema, db: Session = Depends(get_db)):
     
     try:
-        new_license_number = ApplicationUploadSave(id = str(uuid.uuid4()),
-                                                    content = str(request.content),
-                                                    application_type="application",
-                                                    created_at = datetime.now())
-
-        db.add(new_license_number)
+        upsert_application_upload(db, "application", str(request.content))
         db.commit()
 
         print('Application Saved Successfully')
@@ -294,12 +259,7 @@ async def save_bank_application(request: BankApplicationSchema, db: Session = De
 async def save_bank_statement(request: BankApplicationSchema, db: Session = Depends(get_db)):
     
     try:
-        new_license_number = ApplicationUploadSave(id = str(uuid.uuid4()),
-                                                    content = str(request.content),
-                                                    application_type="statement",
-                                                    created_at = datetime.now())
-
-        db.add(new_license_number)
+        upsert_application_upload(db, "statement", str(request.content))
         db.commit()
 
         print('Statement Saved Successfully')
@@ -313,29 +273,91 @@ async def save_bank_statement(request: BankApplicationSchema, db: Session = Depe
 async def get_bureau_record(ssn: str, db: Session = Depends(get_db)):
     """Get Bureau record details by SSN"""
     
-    bureau__record = db.query(Bureau).filter(Bureau.ssn == ssn).first()
+    bureau__record = lookup_cache.get_or_load("bureau", ssn, lambda: load_record(
+        db.query(Bureau).filter(Bureau.ssn == ssn), BureauResponse))
     
     if not bureau__record:
         raise HTTPException(status_code=404, detail="Bureau record not found")
     
     return bureau__record
 
+@app.get("/bureau-records/search", response_model=List[BureauResponse])
+async def search_bureau_records(
+    response: Response,
+    dti_min: Optional[float] = Query(None, description="Inclusive lower bound on dti"),
+    dti_max: Optional[float] = Query(None, description="Inclusive upper bound on dti"),
+    fico_min: Optional[int] = Query(None, description="Inclusive lower bound on fico_range_low"),
+    fico_max: Optional[int] = Query(None, description="Inclusive upper bound on fico_range_low"),
+    revol_util_max: Optional[float] = Query(None, description="Inclusive upper bound on revol_util"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Range search over Bureau records, evaluated in the database on the indexed columns; all bounds are inclusive"""
+
+    filters = []
+    if dti_min is not None:
+        filters.append(Bureau.dti >= dti_min)
+    if dti_max is not None:
+        filters.append(Bureau.dti <= dti_max)
+    if fico_min is not None:
+        filters.append(Bureau.fico_range_low >= fico_min)
+    if fico_max is not None:
+        filters.append(Bureau.fico_range_low <= fico_max)
+    if revol_util_max is not None:
+        filters.append(Bureau.revol_util <= revol_util_max)
+
+    records, next_cursor = keyset_page(db, Bureau, limit, cursor, filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return records
+
+@app.post("/bureau-records/import")
+async def import_bureau_records(
+    file: UploadFile = File(...),
+    batch_size: Optional[int] = Query(None, ge=100, le=100000),
+):
+    """Upsert Bureau records by SSN from a CSV, .csv.gz or Parquet extract"""
+
+    try:
+        fmt = detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The upload is spooled to disk by Starlette; parse and write it off the event loop
+    try:
+        with metric_labels(endpoint="import_bureau_records"), track_stage("bureau_import"):
+            return await run_in_threadpool(import_bureau_file, file.file, fmt, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/kyc-record/{ssn}", response_model=KYCResponse)
 async def get_kyc_record(ssn: str, db: Session = Depends(get_db)):
     """Get KYC record details by SSN"""
     
-    kyc_record = db.query(KYC).filter(KYC.ssn == ssn).first()
+    kyc_record = lookup_cache.get_or_load("kyc", ssn, lambda: load_record(
+        db.query(KYC).filter(KYC.ssn == ssn), KYCResponse))
     
     if not kyc_record:
         raise HTTPException(status_code=404, detail="KYC record not found")
     
     return kyc_record
 
+@app.get("/applicant/{ssn}", response_model=ApplicantProfileResponse, response_model_exclude_unset=True)
+async def get_applicant_profile(
+    ssn: str,
+    license_number: Optional[str] = Query(None, description="Driving license to attach; defaults to the one matching the SSN record's name and address"),
+    fields: Optional[str] = Query(None, description="Comma-separated sections or section.field names, e.g. bureau.dti,bureau.fico_range_low,kyc"),
+    db: Session = Depends(get_db)
+):
+    """Get the SSN record, bureau, KYC and driving license of an applicant in one call"""
+    return load_applicant_profile(db, ssn, license_number, fields)
+
 @app.get("/latest_dl_number")
 async def get_latest_document_by_type(db: Session = Depends(get_db)):
     """Get the latest extracted_number for the given document_type"""
 
-    latest_doc = db.query(DocumentUploadSave).filter(
+    latest_doc = db.query(DocumentUploadSave.extracted_number).filter(
         DocumentUploadSave.document_type == "driving_license"
     ).order_by(DocumentUploadSave.created_at.desc()).first()
 
@@ -348,7 +370,7 @@ async def get_latest_document_by_type(db: Session = Depends(get_db)):
 async def get_latest_document_by_type(db: Session = Depends(get_db)):
     """Get the latest extracted_number for the given document_type"""
 
-    latest_doc = db.query(DocumentUploadSave).filter(
+    latest_doc = db.query(DocumentUploadSave.extracted_number).filter(
         DocumentUploadSave.document_type == "ssn"
     ).order_by(DocumentUploadSave.created_at.desc()).first()
 
@@ -361,7 +383,7 @@ async def get_latest_document_by_type(db: Session = Depends(get_db)):
 async def get_latest_application(db: Session = Depends(get_db)):
     "Get the latest parsed bank application"
 
-    latest_app = db.query(ApplicationUploadSave).filter(
+    latest_app = db.query(ApplicationUploadSave.content).filter(
         ApplicationUploadSave.application_type == "bank_application"
     ).order_by(ApplicationUploadSave.created_at.desc()).first()
 
@@ -374,7 +396,7 @@ async def get_latest_application(db: Session = Depends(get_db)):
 async def get_latest_statement(db: Session = Depends(get_db)):
     "Get the latest parsed bank application"
 
-    latest_app = db.query(ApplicationUploadSave).filter(
+    latest_app = db.query(ApplicationUploadSave.content).filter(
         ApplicationUploadSave.application_type == "bank_statement"
     ).order_by(ApplicationUploadSave.created_at.desc()).first()
 
@@ -384,43 +406,43 @@ async def get_latest_statement(db: Session = Depends(get_db)):
     return latest_app.content
 
 @app.get("/driving-licenses", response_model=List[DrivingLicenseResponse])
-async def get_all_driving_licenses(db: Session = Depends(get_db)):
+async def get_all_driving_licenses(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all driving license records"""
-    licenses = db.query(DrivingLicense).all()
+    licenses = list_records(db, DrivingLicense, DrivingLicenseResponse, params, response)
     return licenses
 
 @app.get("/ssn-records", response_model=List[SSNResponse])
-async def get_all_ssn_records(db: Session = Depends(get_db)):
+async def get_all_ssn_records(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all SSN records"""
-    ssn_records = db.query(SSNRecord).all()
+    ssn_records = list_records(db, SSNRecord, SSNResponse, params, response)
     return ssn_records
 
 @app.get("/bureau-records", response_model=List[BureauResponse])
-async def get_all_bureau_records(db: Session = Depends(get_db)):
+async def get_all_bureau_records(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all Bureau records"""
-    bureau_records = db.query(Bureau).all()
+    bureau_records = list_records(db, Bureau, BureauResponse, params, response)
     return bureau_records
 
 @app.get("/kyc-records", response_model=List[KYCResponse])
-async def get_all_kyc_records(db: Session = Depends(get_db)):
+async def get_all_kyc_records(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     "Get all KYC records"
-    kyc_records = db.query(KYC).all()
+    kyc_records = list_records(db, KYC, KYCResponse, params, response)
     return kyc_records
 
 @app.get("/fetch_all_stored_license", response_model=List[DocumentUploadResponse])
-async def get_all_documents(db: Session = Depends(get_db)):
+async def get_all_documents(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all uploaded document records"""
     try:
-        documents = db.query(DocumentUploadSave).all()
+        documents = list_records(db, DocumentUploadSave, DocumentUploadResponse, params, response)
         return documents
     except Exception as e:
         return f"No values found: {e}"
 
 @app.get("/fetch_all_stored_applications", response_model=List[ApplicationUploadResponse])
-async def get_all_applications(db: Session = Depends(get_db)):
+async def get_all_applications(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all bank applications"""
     try:
-        applications = db.query(ApplicationUploadSave).all()
+        applications = list_records(db, ApplicationUploadSave, ApplicationUploadResponse, params, response)
         return applications
     except Exception as e:
         return f"No values found: {e}" 
@@ -443,6 +465,7 @@ async def delete_all_records(db: Session = Depends(get_db)):
     db.query(Bureau).delete()
     db.query(KYC).delete()
     db.commit()
+    lookup_cache.clear()
     
     return {
         "success": True,
@@ -497,46 +520,22 @@ async def delete_all_records(db: Session = Depends(get_db)):
 
 @app.get("/get_uw_result/{tag}/{ID}")
 async def get_uw_results(tag: str, ID: str):
-    
-    await asyncio.sleep(60)
-
-    url =  'https://apiv2.aryaxai.com/v2/project/get-case-profile'
-    headers = {
-    "Content-Type": "application/json",
-    "x-api-token": uw_key
-    }
-    payload = {
-    "client_id": "amey_balekundri_arya",
-    "project_name": "lending_club_3DEWX2KF8X",
-    "unique_identifier": ID,
-    "tag": tag,
-    "refresh": "true"
-    }
-    # resp_2 = requests.post(url, headers=headers, json=payload)
-    # return resp_2.json()
+    """Poll the AryaXAI case profile until it is ready, backing off between attempts"""
 
-    try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=400)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        # network error or non‑200 status
-        raise HTTPException(status_code=502, detail=f"Upstream request failed: {e}")
+    with metric_labels(endpoint="get_uw_result"), track_stage("scoring_poll"):
+        data, raw_text = await poll_case_profile(tag, ID)
 
-    try:
-        data = resp.json()
-    except ValueError:
+    if data is None:
         # invalid JSON
         return JSONResponse(
             status_code=200,
             content={
                 "warning": "Upstream returned non‑JSON payload",
-                "raw_text": resp.text,
+                "raw_text": raw_text,
             },
         )
 
     return data
-    # except Exception as e:
-    #     raise f'An exception occuered: {e}'
 
 @app.post("/post_underwriting_result")
 async def post_underwriting_result(request: UnderwritingInput, db: Session = Depends(get_db)):
@@ -560,7 +559,7 @@ async def post_underwriting_result(request: UnderwritingInput, db: Session = Dep
 def get_latest_underwriting_result(db: Session = Depends(get_db)):
     try:
         latest_result = (
-            db.query(UnderstatementResult)
+            db.query(UnderstatementResult.content)
             .order_by(UnderstatementResult.created_at.desc())
             .first()
         )
@@ -577,9 +576,9 @@ def get_latest_underwriting_result(db: Session = Depends(get_db)):
         db.close()
 
 @app.get("/get_all_underwriting_results", response_model=List[UnderstatementResponse])
-async def get_all_underwriting_results(db: Session = Depends(get_db)):
+async def get_all_underwriting_results(response: Response, params: ListParams = Depends(), db: Session = Depends(get_db)):
     """Get all driving license records"""
-    understatement = db.query(UnderstatementResult).all()
+    understatement = list_records(db, UnderstatementResult, UnderstatementResponse, params, response)
     return understatement
 
 @app.get("/run_underwriting_flow")
@@ -598,12 +597,15 @@ async def run_underwriting_flow():
     # Request headers
     headers = {
         "Content-Type": "application/json",
-        "x-api-key": xai_api_key  # Authentication key from environment variable    
+        "x-api-key": xai_api_key or ""  # Authentication key from environment variable    
     }
 
+    # Send API request over the shared keep-alive client so the event loop stays free while the flow runs
+    client = upstream_clients.get("langflow") or build_client("langflow")
+
     try:
-        # Send API request
-        response = requests.request("POST", url, json=payload, headers=headers, timeout=900)
+        with metric_labels(endpoint="run_underwriting_flow"), track_stage("langflow_run"):
+            response = await client.post(url, json=payload, headers=headers)
         response.raise_for_status()  # Raise exception for bad status codes
 
         # Print response
@@ -615,10 +617,40 @@ async def run_underwriting_flow():
 
         return json_response
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error making API request: {e}")
     except ValueError as e:
         print(f"Error parsing response: {e}")
+    finally:
+        if client is not upstream_clients.get("langflow"):
+            await client.aclose()
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit rates and latency for the LLM result cache and the record lookup cache"""
+    return {
+        "llm_results": llm_result_cache.stats(),
+        "lookups": lookup_cache.stats(),
+    }
+
+@app.delete("/cache/llm-results")
+async def clear_llm_result_cache(expired_only: bool = False, db: Session = Depends(get_db)):
+    """Purge cached LLM verdicts, e.g. after changing the model or a prompt"""
+    if expired_only:
+        deleted = llm_result_cache.purge_expired(db)
+    else:
+        deleted = llm_result_cache.clear(db)
+    return {"deleted_rows": deleted}
+
+@app.get("/diagnostics/pool")
+async def get_pool_diagnostics():
+    """Live database connection pool statistics"""
+    return pool_status()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Per-stage latency histograms and error counters in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
@@ -629,6 +661,22 @@ async def health_check():
 @app.on_event("startup")
 async def startup_event():
     init_dummy_data()
+    lookup_cache.clear()
+    db = SessionLocal()
+    try:
+        print(f"Purged {llm_result_cache.purge_expired(db)} expired LLM cache rows")
+    finally:
+        db.close()
+    await upstream_clients.start()
+    await upload_job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await upload_job_queue.stop()
+    await wait_for_archives()
+    await upstream_clients.close()
+    shutdown_pdf_pool()
+    shutdown_image_pool()
 
 # Run the application
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Minimal in-process Prometheus metrics: a counter and a fixed-bucket histogram,
+# rendered in the text exposition format by GET /metrics.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, labelvalues, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(labelnames, labelvalues)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket (non-cumulative) counts, +Inf last, then sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_LABELS = ("stage", "endpoint", "document_type")
+stage_duration = registry.histogram("uw_stage_duration_seconds",
+                                    "Duration of upload, underwriting-flow and scoring-poll pipeline stages",
+                                    STAGE_LABELS)
+stage_errors = registry.counter("uw_stage_errors_total", "Pipeline stages that raised", STAGE_LABELS)
+image_bytes = registry.counter("uw_image_bytes_total", "Image payload bytes before (in) and after (out) preprocessing",
+                               ("direction",))
+local_extraction_total = registry.counter("uw_local_extraction_total",
+                                         "Text uploads the local extractor handled vs. passed to the LLM",
+                                         ("document_type", "outcome"))
+bank_classifier_total = registry.counter("uw_bank_classifier_total",
+                                        "Bank uploads the local classifier accepted, rejected or passed to the LLM",
+                                        ("document_type", "outcome"))
+prompt_tokens = registry.counter("uw_prompt_tokens_total", "Estimated document tokens sent to and trimmed from LLM prompts",
+                                ("task", "kind"))
+prompt_tokens_saved = registry.histogram("uw_prompt_tokens_saved", "Estimated tokens trimmed from one trimmed prompt",
+                                         ("task",), buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000))
+http_request_duration = registry.histogram("uw_http_request_duration_seconds", "HTTP request latency by route",
+                                           ("method", "route", "status"))
+
+# The endpoint and document type a stage is attributed to, set once by the caller of the pipeline
+_stage_context = ContextVar("metric_stage_context", default={})
+
+@contextmanager
+def metric_labels(**labels):
+    """Attribute every stage timed inside the block to ``endpoint``/``document_type``"""
+    labels = {key: getattr(value, 'value', value) for key, value in labels.items()}
+    token = _stage_context.set({**_stage_context.get(), **labels})
+    try:
+        yield
+    finally:
+        _stage_context.reset(token)
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a pipeline stage into ``uw_stage_duration_seconds``, counting failures"""
+    labels = {"stage": stage, **_stage_context.get()}
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(**labels)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - start, **labels)
@@ -0,0 +1,202 @@
+import argparse
+
+from sqlalchemy import inspect, text, Numeric, String, select, update, bindparam, type_coerce
+from sqlalchemy.engine import Engine
+
+from database import Bureau, DocumentUploadSave, ApplicationUploadSave, UnderstatementResult, UploadJob
+from compression import CompressedText, compress_text, is_encoded
+from dedup import content_hash
+
+# Schema changes that create_all cannot make on tables that already exist.
+# Every step checks the live schema first, so running them on each start is safe.
+
+def bureau_numeric_columns() -> list:
+    return [column.name for column in Bureau.__table__.columns if isinstance(column.type, Numeric)]
+
+def _clean_numeric_sql(column: str, dialect: str) -> str:
+    """SQL turning a legacy string value into a number, or NULL when it does not parse"""
+    if dialect == 'postgresql':
+        cleaned = f"regexp_replace({column}, '[%,$\\s]', '', 'g')"
+        return (f"CASE WHEN {cleaned} ~ '^[-+]?([0-9]+\\.?[0-9]*|\\.[0-9]+)$' "
+                f"THEN round({cleaned}::numeric, 2) ELSE NULL END")
+    cleaned = f"trim(replace(replace(replace({column}, '%', ''), ',', ''), '$', ''))"
+    return (f"CASE WHEN {cleaned} = '' OR {cleaned} GLOB '*[^0-9.+-]*' THEN NULL "
+            f"ELSE round(CAST({cleaned} AS REAL), 2) END")
+
+def migrate_bureau_numeric_columns(engine: Engine):
+    """Convert Bureau monetary/ratio columns stored as strings into NUMERIC, keeping their data"""
+    inspector = inspect(engine)
+    if not inspector.has_table(Bureau.__tablename__):
+        return
+
+    existing = {column['name']: column['type'] for column in inspector.get_columns(Bureau.__tablename__)}
+    legacy = [name for name in bureau_numeric_columns()
+              if name in existing and not isinstance(existing[name], Numeric)]
+    if not legacy:
+        return
+
+    print(f'Migrating {len(legacy)} bureau columns to NUMERIC')
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        if dialect == 'postgresql':
+            for name in legacy:
+                conn.execute(text(f"ALTER TABLE bureau ALTER COLUMN {name} TYPE NUMERIC(14, 2) "
+                                  f"USING {_clean_numeric_sql(name, dialect)}"))
+        else:
+            # SQLite cannot change a column type in place: rebuild the table and copy the rows over
+            for index in inspector.get_indexes(Bureau.__tablename__):
+                conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+            conn.execute(text("ALTER TABLE bureau RENAME TO bureau_legacy"))
+            Bureau.__table__.create(conn)
+            columns = [column.name for column in Bureau.__table__.columns if column.name in existing]
+            select_list = ", ".join(_clean_numeric_sql(name, dialect) if name in legacy else name for name in columns)
+            conn.execute(text(f"INSERT INTO bureau ({', '.join(columns)}) SELECT {select_list} FROM bureau_legacy"))
+            conn.execute(text("DROP TABLE bureau_legacy"))
+
+    ensure_indexes(engine, Bureau.__table__)
+
+def ensure_indexes(engine: Engine, table):
+    """Create any index declared on ``table`` that the live database is missing"""
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+def add_content_hash_columns(engine: Engine):
+    """Add the dedup content_hash column to upload tables created before it existed"""
+    inspector = inspect(engine)
+    for model in (DocumentUploadSave, ApplicationUploadSave):
+        table = model.__tablename__
+        if not inspector.has_table(table):
+            continue
+        if 'content_hash' not in {column['name'] for column in inspector.get_columns(table)}:
+            print(f'Adding content_hash to {table}')
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN content_hash VARCHAR(64)"))
+
+def add_upload_job_owner_column(engine: Engine):
+    """Add the owner column to an upload_jobs table created before jobs recorded their worker"""
+    inspector = inspect(engine)
+    if not inspector.has_table(UploadJob.__tablename__):
+        return
+    if 'owner' not in {column['name'] for column in inspector.get_columns(UploadJob.__tablename__)}:
+        print('Adding owner to upload_jobs')
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE upload_jobs ADD COLUMN owner VARCHAR"))
+
+def run_migrations(engine: Engine):
+    migrate_bureau_numeric_columns(engine)
+    add_content_hash_columns(engine)
+    add_upload_job_owner_column(engine)
+    for model in (Bureau, DocumentUploadSave, ApplicationUploadSave, UnderstatementResult, UploadJob):
+        ensure_indexes(engine, model.__table__)
+
+def compressed_columns() -> list:
+    """Every (table, column) stored with CompressedText"""
+    return [(model.__table__, column) for model in (ApplicationUploadSave, UnderstatementResult)
+            for column in model.__table__.columns if isinstance(column.type, CompressedText)]
+
+def backfill_compressed_columns(engine: Engine, batch_size: int = 500) -> dict:
+    """Compress legacy plain-text values in place; safe to re-run and to run while the API is up"""
+    summary = {}
+    for table, column in compressed_columns():
+        # type_coerce to String reads the stored value without decompressing it
+        stored = type_coerce(column, String)
+        statement = (update(table).where(table.c.id == bindparam("row_id"))
+                     .values({column.name: bindparam("compressed", type_=String)}))
+        rows = compressed = bytes_before = bytes_after = 0
+        last_id = ""
+        while True:
+            with engine.begin() as conn:
+                batch = conn.execute(
+                    select(table.c.id, stored).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                updates = []
+                for row_id, value in batch:
+                    rows += 1
+                    if value is None or is_encoded(value):
+                        continue
+                    encoded = compress_text(value)
+                    if encoded != value:
+                        updates.append({"row_id": row_id, "compressed": encoded})
+                        bytes_before += len(value)
+                        bytes_after += len(encoded)
+                if updates:
+                    conn.execute(statement, updates)
+                    compressed += len(updates)
+        summary[f"{table.name}.{column.name}"] = {
+            "rows_scanned": rows, "rows_compressed": compressed,
+            "chars_before": bytes_before, "chars_after": bytes_after,
+        }
+        print(f"{table.name}.{column.name}: compressed {compressed} of {rows} rows, "
+              f"{bytes_before} -> {bytes_after} characters")
+    return summary
+
+# How each upload table's rows are hashed: (model, type column, hashed value column)
+DEDUP_TABLES = (
+    (DocumentUploadSave, "document_type", "extracted_number"),
+    (ApplicationUploadSave, "application_type", "content"),
+)
+
+def compact_duplicates(engine: Engine, batch_size: int = 500) -> dict:
+    """Hash legacy upload rows and merge duplicates into one row carrying the latest created_at"""
+    summary = {}
+    for model, kind_column, value_column in DEDUP_TABLES:
+        table = model.__table__
+        hashed = merged = 0
+        last_id = ""
+        while True:
+            with engine.begin() as conn:
+                batch = conn.execute(
+                    select(table.c.id, table.c[kind_column], table.c[value_column], table.c.created_at)
+                    .where(table.c.content_hash.is_(None), table.c.id > last_id)
+                    .order_by(table.c.id).limit(batch_size)
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                hashes = {row.id: content_hash(row[1], row[2]) for row in batch}
+                survivors = {
+                    row.content_hash: [row.id, row.created_at] for row in conn.execute(
+                        select(table.c.id, table.c.content_hash, table.c.created_at)
+                        .where(table.c.content_hash.in_(set(hashes.values())))
+                    )
+                }
+                refreshed, duplicates = set(), []
+                for row in batch:
+                    digest = hashes[row.id]
+                    survivor = survivors.get(digest)
+                    if survivor is None:
+                        survivors[digest] = [row.id, row.created_at]
+                        conn.execute(update(table).where(table.c.id == row.id).values(content_hash=digest))
+                        hashed += 1
+                        continue
+                    duplicates.append(row.id)
+                    if row.created_at and (survivor[1] is None or row.created_at > survivor[1]):
+                        survivor[1] = row.created_at
+                        refreshed.add(digest)
+                if duplicates:
+                    conn.execute(table.delete().where(table.c.id.in_(duplicates)))
+                    merged += len(duplicates)
+                for digest in refreshed:
+                    survivor_id, created_at = survivors[digest]
+                    conn.execute(update(table).where(table.c.id == survivor_id).values(created_at=created_at))
+        summary[table.name] = {"rows_hashed": hashed, "duplicates_merged": merged}
+        print(f"{table.name}: hashed {hashed} rows, merged {merged} duplicates")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run schema migrations and one-off data backfills")
+    parser.add_argument("command", choices=["migrate", "backfill-compression", "compact-duplicates"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from database import engine
+    run_migrations(engine)
+    if args.command == "backfill-compression":
+        backfill_compressed_columns(engine, args.batch_size)
+    elif args.command == "compact-duplicates":
+        compact_duplicates(engine, args.batch_size)
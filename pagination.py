@@ -0,0 +1,88 @@
+import os
+import base64
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+list_default_page_size = int(os.environ.get('LIST_DEFAULT_PAGE_SIZE', '100'))
+list_max_page_size = int(os.environ.get('LIST_MAX_PAGE_SIZE', '1000'))
+list_stream_batch_size = int(os.environ.get('LIST_STREAM_BATCH_SIZE', '500'))
+
+def encode_cursor(last_id: str) -> str:
+    return base64.urlsafe_b64encode(last_id.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        last_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except Exception:
+        last_id = None
+    if not last_id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+class ListParams:
+    """Query parameters shared by the list-all endpoints.
+
+    Without ``limit`` or ``cursor`` the endpoints keep returning the whole
+    table; with either they return one keyset page and put the cursor for the
+    next page in the ``X-Next-Cursor`` header. ``stream=true`` returns NDJSON.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=list_max_page_size, description="Page size for keyset pagination"),
+        cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+        stream: bool = Query(False, description="Stream every row (after the cursor) as NDJSON"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = stream
+
+
+def keyset_page(db: Session, model, limit: int, cursor: Optional[str] = None, filters: list = None):
+    """One page of ``model`` rows ordered by primary key, plus the cursor of the next page"""
+    query = db.query(model).filter(*(filters or [])).order_by(model.id)
+    if cursor:
+        query = query.filter(model.id > decode_cursor(cursor))
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def stream_ndjson(model, schema, cursor: Optional[str] = None, batch_size: int = None):
+    """Yield rows as NDJSON in batches from a server-side cursor, with its own session"""
+    batch_size = batch_size or list_stream_batch_size
+    after_id = decode_cursor(cursor) if cursor else None
+    db = SessionLocal()
+    try:
+        query = db.query(model).order_by(model.id)
+        if after_id:
+            query = query.filter(model.id > after_id)
+        lines = []
+        # yield_per streams through a server-side cursor on Postgres instead of buffering the table
+        for row in query.yield_per(batch_size):
+            lines.append(schema.model_validate(row, from_attributes=True).model_dump_json())
+            if len(lines) >= batch_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    finally:
+        db.close()
+
+def list_records(db: Session, model, schema, params: ListParams, response: Response):
+    """Serve a list-all endpoint as a full list, a keyset page or an NDJSON stream"""
+    if params.stream:
+        return StreamingResponse(stream_ndjson(model, schema, params.cursor), media_type="application/x-ndjson")
+
+    if params.limit is None and params.cursor is None:
+        return db.query(model).all()
+
+    rows, next_cursor = keyset_page(db, model, params.limit or list_default_page_size, params.cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
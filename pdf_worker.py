@@ -0,0 +1,9 @@
+import io
+import PyPDF2
+
+# Kept free of application imports so spawned extraction workers start quickly.
+
+def extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> list:
+    """Extract the text of pages ``start`` to ``stop`` (exclusive) of an in-memory PDF"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
@@ -0,0 +1,199 @@
+import io
+import os
+import base64
+import asyncio
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from cloudinary.uploader import upload as cloudinary_upload
+
+from schemas import DocumentUploadMessage, ApplicationUploadMessage, FusedVerificationResult
+from utils import extract_text_from_pdf_async, verify_document_async, verify_and_extract_document_async, llm_cache_scope
+from cache import llm_result_cache
+from image_processing import prepare_image_async
+from local_extraction import extract_locally
+from classifier import bank_classifier
+from dedup import upsert_document_upload, upsert_application_upload
+from metrics import track_stage
+
+# The upload pipelines shared by the synchronous endpoints, the job queue and bulk ingestion
+
+PERSONAL_DOCUMENT_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'}
+BANK_DOCUMENT_EXTENSIONS = {'.pdf'}
+
+# 'inline' sends images to the LLM as base64 data URLs; 'cloudinary' uploads first and sends the public URL
+image_delivery_mode = os.environ.get('IMAGE_DELIVERY_MODE', 'inline')
+# Keep a copy of inline-delivered images in Cloudinary, uploaded in the background
+cloudinary_archive = os.environ.get('CLOUDINARY_ARCHIVE', 'false').lower() == 'true'
+
+IMAGE_MIME_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png'}
+
+_archive_tasks = set()
+
+def image_data_url(data: bytes, file_extension: str) -> str:
+    """Encode an image as a data URL the Responses API accepts in input_image"""
+    encoded = base64.b64encode(data).decode('ascii')
+    return f"data:{IMAGE_MIME_TYPES[file_extension]};base64,{encoded}"
+
+async def _archive_image(data: bytes, filename: str):
+    try:
+        with track_stage("cloudinary_archive"):
+            upload_result = await run_in_threadpool(cloudinary_upload, io.BytesIO(data), resource_type="image")
+        print(f'Archived {filename} to {upload_result["secure_url"]}')
+    except Exception as e:
+        print(f'Couldnt archive {filename} to Cloudinary: {e}')
+
+def archive_image_in_background(data: bytes, filename: str):
+    """Upload an image to Cloudinary without holding up the request"""
+    task = asyncio.create_task(_archive_image(data, filename))
+    _archive_tasks.add(task)
+    task.add_done_callback(_archive_tasks.discard)
+
+async def wait_for_archives(timeout: float = 30):
+    """Give in-flight archive uploads a chance to finish, e.g. at shutdown"""
+    if _archive_tasks:
+        await asyncio.wait(list(_archive_tasks), timeout=timeout)
+
+def validate_extension(filename: str, allowed_extensions: set) -> str:
+    """Return the lower-cased file extension or raise a 400 if it is not allowed"""
+    file_extension = Path(filename).suffix.lower()
+
+    if file_extension not in allowed_extensions:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File type {file_extension} not allowed. Allowed types: {', '.join(allowed_extensions)}"
+        )
+    return file_extension
+
+async def process_personal_document(filename: str, data: bytes, document_type, db: Session) -> DocumentUploadMessage:
+    """Verify a driving license/SSN upload, extract its number and save it"""
+
+    file_extension = Path(filename).suffix.lower()
+
+    cache_key = llm_result_cache.key_for(data, document_type, llm_cache_scope())
+    with track_stage("cache_lookup"):
+        cached = llm_result_cache.get(db, cache_key)
+    image_url = ''
+    file_path = ''
+    # Only LLM verdicts are cached; the local read is cheaper than a cache lookup and changes with the extractor
+    from_llm = True
+
+    # Extract content based on file type
+    if cached is not None:
+        print('Using cached verification result')
+        result = FusedVerificationResult(**cached)
+    elif file_extension == '.pdf':
+        content = await extract_text_from_pdf_async(data)
+        # content = extract_text_from_pdf(file)
+        with track_stage("local_extract"):
+            local_number, confidence = extract_locally(content, document_type)
+        if local_number:
+            # Card text with an unambiguous number and nothing that reads like another document
+            print(f'Extracted locally with confidence {confidence:.2f}')
+            result = FusedVerificationResult(is_valid=True, document_type=getattr(document_type, 'value', document_type),
+                                             extracted_number=local_number)
+            from_llm = False
+        else:
+            result = await verify_and_extract_document_async(document_type, 'text', content, image_url)
+    else:
+        content = ''
+        image_data, llm_extension = await prepare_image_async(data, file_extension, filename)
+        # image_url = f"https://ac7ebdf3091e.ngrok-free.app/{file.filename}" 
+        if image_delivery_mode == 'cloudinary':
+            with track_stage("cloudinary_upload"):
+                upload_result = await run_in_threadpool(cloudinary_upload, io.BytesIO(image_data), resource_type="image")
+            image_url = file_path = upload_result['secure_url']
+            print(f'The image URL obtained: {image_url}')
+        else:
+            image_url = image_data_url(image_data, llm_extension)
+            print(f'Sending {filename} inline ({len(image_data)} bytes)')
+            if cloudinary_archive:
+                archive_image_in_background(data, filename)
+        result = await verify_and_extract_document_async(document_type, 'image', content, image_url)
+
+    if cached is None and from_llm:
+        llm_result_cache.set(db, cache_key, result.model_dump())
+
+    if not result.is_valid:
+        print('Failed verification')
+        return DocumentUploadMessage(
+                success=False,
+                message=f"Couldn't Upload the document: {document_type}",
+                document_type=document_type,
+                extracted_number="",
+                file_path=file_path
+            )
+
+    extracted_number = result.extracted_number
+
+    print(f'The number extracted: {extracted_number}')
+    
+    upsert_document_upload(db, document_type, extracted_number)
+    with track_stage("db_commit"):
+        db.commit()
+
+    print('Document Saved Successfully')
+
+    return DocumentUploadMessage(
+        success=True,
+        message=f"Successfully extracted {document_type} number",
+        document_type=document_type,
+        extracted_number=extracted_number,
+        file_path=''
+    )
+
+async def process_bank_document(data: bytes, application_type, db: Session) -> ApplicationUploadMessage:
+    """Verify a bank application/statement PDF and save its extracted text"""
+
+    # content = extract_text_from_pdf(file_path)
+
+    content = await extract_text_from_pdf_async(data)
+
+    image_url = ''
+
+    cache_key = llm_result_cache.key_for(data, application_type, llm_cache_scope())
+    with track_stage("cache_lookup"):
+        cached = llm_result_cache.get(db, cache_key)
+
+    if cached is not None:
+        print('Using cached verification result')
+        verified = str(cached['is_valid'])
+    else:
+        with track_stage("bank_prescreen"):
+            verified = bank_classifier.prescreen(content, application_type)
+        # Only LLM verdicts are cached, so retraining the classifier or moving its thresholds takes effect at once
+        if verified is None:
+            verified = await verify_document_async(application_type, 'text', content, image_url)
+            if verified in (str('True'), str('False')):
+                llm_result_cache.set(db, cache_key, {"is_valid": verified == str('True')})
+
+    if verified == str('True'):
+        try:
+            upsert_application_upload(db, application_type, content)
+            with track_stage("db_commit"):
+                db.commit()
+
+            print('Document Saved Successfully')
+
+            return ApplicationUploadMessage(
+                success=True,
+                message=f"Successfully extracted {application_type}",
+                application_type=application_type,
+                content=content,
+                file_path=''
+            )
+
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f'Couldnt upload file due to: {e}')
+        
+    elif verified == str('False'):
+        return ApplicationUploadMessage(
+                success=False,
+                message=f"Couldn't Upload the document: {application_type}",
+                application_type=application_type,
+                content="",
+                file_path=''
+            )
@@ -0,0 +1,114 @@
+import os
+import re
+import math
+import threading
+
+from metrics import prompt_tokens, prompt_tokens_saved
+
+# Long PDF text is trimmed to a per-task token budget before it goes into a prompt:
+# the opening lines (title, header page) first, then the lines that matter for the task.
+prompt_budget_enabled = os.environ.get('PROMPT_BUDGET_ENABLED', 'true').lower() == 'true'
+PROMPT_TOKEN_BUDGETS = {
+    "verify": int(os.environ.get('PROMPT_TOKEN_BUDGET_VERIFY', '1500')),
+    "extract": int(os.environ.get('PROMPT_TOKEN_BUDGET_EXTRACT', '1500')),
+    "verify_extract": int(os.environ.get('PROMPT_TOKEN_BUDGET_VERIFY_EXTRACT', '2000')),
+}
+# Share of the budget reserved for the opening lines of the document
+prompt_head_share = float(os.environ.get('PROMPT_HEAD_SHARE', '0.6'))
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+MAX_LINE_CHARS = 400
+
+# Lines worth keeping beyond the head, per task
+TASK_KEYWORDS = {
+    "verify": re.compile(
+        r"statement|application|applicant|balance|account|period|deposit|withdraw|loan|income|employer|signature"
+        r"|social\s+security|licen[cs]e|driver",
+        re.IGNORECASE),
+    "extract": re.compile(r"social\s+security|\bssn\b|licen[cs]e|\bDLN?\b|number|\bno\b|#|\d{3}[- ]?\d{2}[- ]?\d{4}",
+                          re.IGNORECASE),
+}
+TASK_KEYWORDS["verify_extract"] = re.compile(
+    TASK_KEYWORDS["verify"].pattern + "|" + TASK_KEYWORDS["extract"].pattern, re.IGNORECASE)
+
+
+def _get_encoding():
+    """The tiktoken encoding, loaded on first use (it may be downloaded); None when unavailable"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    print(f"tiktoken unavailable, estimating tokens from length: {e}")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise the ~4 characters per token rule of thumb"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def budget_content(content: str, task: str) -> str:
+    """Trim ``content`` to the token budget of ``task``, keeping the head and the task-relevant lines"""
+    budget = PROMPT_TOKEN_BUDGETS[task]
+    original_tokens = estimate_tokens(content)
+    if not prompt_budget_enabled or original_tokens <= budget:
+        prompt_tokens.inc(original_tokens, task=task, kind="sent")
+        return content
+
+    # PDF text sometimes comes out as a few enormous lines; split them so they can be trimmed
+    lines = [line[start:start + MAX_LINE_CHARS]
+             for line in content.splitlines() for start in range(0, max(len(line), 1), MAX_LINE_CHARS)]
+    # Apportion the whole-text count by length instead of tokenizing every line again
+    tokens_per_char = original_tokens / max(len(content), 1)
+    line_tokens = [math.ceil(len(line) * tokens_per_char) + 1 for line in lines]
+    keep = [False] * len(lines)
+    used = 0
+
+    # Title and header lines first
+    for index, tokens in enumerate(line_tokens):
+        if used + tokens > budget * prompt_head_share:
+            break
+        keep[index] = True
+        used += tokens
+
+    # Then any later line that looks relevant to the task, in document order
+    keywords = TASK_KEYWORDS[task]
+    for index, line in enumerate(lines):
+        if keep[index] or not keywords.search(line):
+            continue
+        if used + line_tokens[index] > budget:
+            continue
+        keep[index] = True
+        used += line_tokens[index]
+
+    trimmed, omitted = [], 0
+    for line, kept in zip(lines, keep):
+        if kept:
+            if omitted:
+                trimmed.append(f"[... {omitted} lines omitted ...]")
+                omitted = 0
+            trimmed.append(line)
+        else:
+            omitted += 1
+    if omitted:
+        trimmed.append(f"[... {omitted} lines omitted ...]")
+    content = "\n".join(trimmed)
+
+    sent_tokens = estimate_tokens(content)
+    prompt_tokens.inc(sent_tokens, task=task, kind="sent")
+    prompt_tokens.inc(original_tokens - sent_tokens, task=task, kind="saved")
+    prompt_tokens_saved.observe(original_tokens - sent_tokens, task=task)
+    print(f"Trimmed {task} prompt content from {original_tokens} to {sent_tokens} tokens")
+    return content
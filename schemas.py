@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime, date
 from enum import Enum
+from decimal import Decimal
 
 class ApplicationDocumentType(str, Enum):
     DRIVING_LICENSE = "driving_license"
@@ -39,6 +40,11 @@ class DocumentUploadMessage(BaseModel):
     extracted_number: str
     file_path: str
 
+class FusedVerificationResult(BaseModel):
+    is_valid: bool
+    document_type: str
+    extracted_number: str = ""
+
 class ApplicationUploadMessage(BaseModel):
     success: bool
     message: str
@@ -170,12 +176,27 @@ class BureauResponse(BaseModel):
     debt_settlement_flag: Optional[str]
     created_at: datetime
 
+    @field_validator("*", mode="before")
+    @classmethod
+    def numeric_as_string(cls, value):
+        # Monetary and ratio columns are stored as Numeric but keep their string form in the API
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
 class KYCResponse(BaseModel):
     id: str
     ssn: str
     zip_code: str
     addr_state: str
 
+class ApplicantProfileResponse(BaseModel):
+    ssn: str
+    ssn_record: Optional[dict] = None
+    bureau: Optional[dict] = None
+    kyc: Optional[dict] = None
+    driving_license: Optional[dict] = None
+
 class DocumentUploadResponse(BaseModel):
     id: Optional[str] = None
     document_type: str
@@ -193,6 +214,22 @@ class UnderstatementResponse(BaseModel):
     content: str
     created_at: datetime
 
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusResponse(BaseModel):
+    id: str
+    job_type: str
+    document_type: str
+    filename: Optional[str] = None
+    status: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class UnderwritingInput(BaseModel):
     payload_content: str
 
@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+
+import httpx
+from fastapi import HTTPException
+
+from http_clients import UPSTREAM_SETTINGS, build_client, build_timeout, upstream_clients
+from metrics import track_stage
+
+uw_key = os.environ.get('UW_API_KEY')
+uw_api_base_url = os.environ.get('UW_API_BASE_URL', 'https://apiv2.aryaxai.com')
+uw_client_id = os.environ.get('UW_CLIENT_ID', 'amey_balekundri_arya')
+uw_project_name = os.environ.get('UW_PROJECT_NAME', 'lending_club_3DEWX2KF8X')
+
+# Poll the case profile with exponential backoff until it is ready or the deadline passes
+uw_poll_initial_delay = float(os.environ.get('UW_POLL_INITIAL_DELAY', '5'))
+uw_poll_interval = float(os.environ.get('UW_POLL_INTERVAL', '2'))
+uw_poll_max_interval = float(os.environ.get('UW_POLL_MAX_INTERVAL', '30'))
+uw_poll_backoff = float(os.environ.get('UW_POLL_BACKOFF', '2'))
+uw_poll_deadline = float(os.environ.get('UW_POLL_DEADLINE', '400'))
+
+PENDING_STATES = {"pending", "processing", "in_progress", "in progress", "queued", "running", "registered"}
+
+def is_case_profile_ready(data) -> bool:
+    """A case profile is ready once it reports no pending status and carries more than an envelope"""
+    if not isinstance(data, dict):
+        return False
+    if data.get("success") is False:
+        return False
+    if str(data.get("status", "")).strip().lower() in PENDING_STATES:
+        return False
+    return any(value not in (None, "", [], {}) for key, value in data.items()
+               if key not in ("success", "message", "status"))
+
+async def poll_case_profile(tag: str, unique_identifier: str, client: httpx.AsyncClient = None):
+    """Fetch the AryaXAI case profile, returning as soon as it is ready.
+
+    Returns the parsed JSON (or the last response seen when the deadline
+    passes first) and the raw text of the last response. A non-JSON response
+    is returned straight away with ``None`` as the data. Only the first
+    request asks the API to refresh the case; the polls that follow just read it.
+    """
+    url = f'{uw_api_base_url}/v2/project/get-case-profile'
+    headers = {
+    "Content-Type": "application/json",
+    "x-api-token": uw_key or ""
+    }
+    payload = {
+    "client_id": uw_client_id,
+    "project_name": uw_project_name,
+    "unique_identifier": unique_identifier,
+    "tag": tag,
+    "refresh": "true"
+    }
+
+    client = client or upstream_clients.get("scoring")
+    owns_client = client is None
+    if owns_client:
+        client = build_client("scoring")
+    settings = UPSTREAM_SETTINGS["scoring"]
+
+    deadline = time.monotonic() + uw_poll_deadline
+    interval = uw_poll_interval
+    data, raw_text, last_error = None, None, None
+    attempts = 0
+
+    try:
+        await asyncio.sleep(min(uw_poll_initial_delay, uw_poll_deadline))
+        while True:
+            attempts += 1
+            try:
+                read_timeout = min(settings["read_timeout"], max(1.0, deadline - time.monotonic()))
+                with track_stage("scoring_request"):
+                    resp = await client.post(url, headers=headers, json=payload,
+                                             timeout=build_timeout(settings, read_timeout))
+                if resp.status_code < 500:
+                    resp.raise_for_status()
+                    payload["refresh"] = "false"
+                    raw_text = resp.text
+                    try:
+                        data = resp.json()
+                    except ValueError:
+                        # Polling again will not turn this into JSON; let the caller report it
+                        return None, raw_text
+                    if is_case_profile_ready(data):
+                        print(f'Case profile {unique_identifier} ready after {attempts} attempts')
+                        return data, raw_text
+                else:
+                    last_error = f"{resp.status_code} from scoring API"
+            except httpx.HTTPStatusError as e:
+                # 4xx will not fix itself by retrying
+                raise HTTPException(status_code=502, detail=f"Upstream request failed: {e}")
+            except httpx.HTTPError as e:
+                last_error = str(e) or e.__class__.__name__
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * uw_poll_backoff, uw_poll_max_interval)
+    finally:
+        if owns_client:
+            await client.aclose()
+
+    if raw_text is None:
+        # network error or non‑200 status
+        raise HTTPException(status_code=502, detail=f"Upstream request failed: {last_error}")
+
+    print(f'Case profile {unique_identifier} not ready before the {uw_poll_deadline}s deadline')
+    return data, raw_text
@@ -1,16 +1,50 @@
+import io
 import os
 import re
+import json
+import asyncio
+import multiprocessing
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import PyPDF2
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 import openai
 from dotenv import load_dotenv
+from pydantic import ValidationError
+from schemas import FusedVerificationResult
+from pdf_worker import extract_page_range
+from metrics import track_stage
+from prompts import budget_content
 
 openai_api_key = os.environ.get('OPENAI_API_KEY')
 
+llm_model = os.environ.get('LLM_MODEL', 'gpt-4.1')
+
 client = openai.OpenAI(api_key=openai_api_key)
 
+# Async client used by the request handlers so a slow LLM call never blocks the event loop.
+# The semaphore bounds how many LLM calls a single worker keeps in flight at once.
+async_client = openai.AsyncOpenAI(api_key=openai_api_key)
+llm_max_concurrency = int(os.environ.get('LLM_MAX_CONCURRENCY', '32'))
+llm_semaphore = asyncio.Semaphore(llm_max_concurrency)
+
+# 'fused' verifies and extracts personal documents in a single LLM call,
+# 'two_step' keeps the original verify_document -> extract_document_with_llm round trips.
+llm_verify_mode = os.environ.get('LLM_VERIFY_MODE', 'fused')
+
+# Bump whenever a verification or extraction prompt, or how a verdict is reached, changes
+# so cached verdicts from the old version are not reused
+LLM_PROMPT_VERSION = 2
+
+# Large PDFs are split into page chunks and extracted in a process pool
+pdf_max_pages = int(os.environ.get('PDF_MAX_PAGES', '500'))
+pdf_pages_per_chunk = int(os.environ.get('PDF_PAGES_PER_CHUNK', '8'))
+pdf_extract_timeout = float(os.environ.get('PDF_EXTRACT_TIMEOUT', '120'))
+pdf_workers = int(os.environ.get('PDF_WORKERS', str(os.cpu_count() or 1)))
+_pdf_pool = None
+
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
@@ -19,13 +53,34 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     try:
         with open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
+            return "".join(page.extract_text() for page in pdf_reader.pages)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
     
+def _pdf_page_count(pdf_bytes: bytes) -> int:
+    """Count pages and enforce the configured page cap"""
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+    if page_count > pdf_max_pages:
+        raise HTTPException(status_code=413, detail=f"PDF has {page_count} pages, the limit is {pdf_max_pages}")
+    return page_count
+
+def _pdf_page_chunks(page_count: int):
+    return [(start, min(start + pdf_pages_per_chunk, page_count))
+            for start in range(0, page_count, pdf_pages_per_chunk)]
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all PDF extractions, created on first use"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=pdf_workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pdf_pool
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
 def extract_text_from_pdf_stream(file_stream) -> str:
     """Extract text directly from in-memory uploaded PDF file"""
     try:
@@ -37,52 +92,97 @@ def extract_text_from_pdf_stream(file_stream) -> str:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
 
-def extract_document_with_llm(content: str, document_type: str, image_url: str) -> str:
-    """Extract license/SSN number using LLM (OpenAI)"""
+async def extract_text_from_pdf_async(pdf_bytes: bytes) -> str:
+    """Extract text from an uploaded PDF off the event loop, spreading large documents over the process pool"""
+    with track_stage("pdf_extract"):
+        return await _extract_text_from_pdf_async(pdf_bytes)
+
+async def _extract_text_from_pdf_async(pdf_bytes: bytes) -> str:
+    try:
+        # One deadline covers parsing the page count as well as the extraction itself
+        return await asyncio.wait_for(_extract_pages(pdf_bytes), timeout=pdf_extract_timeout)
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=400, detail=f"Error reading PDF: timed out after {pdf_extract_timeout}s")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
+
+async def _extract_pages(pdf_bytes: bytes) -> str:
+    loop = asyncio.get_running_loop()
+    page_count = await loop.run_in_executor(None, _pdf_page_count, pdf_bytes)
+    if page_count <= pdf_pages_per_chunk:
+        pages = await loop.run_in_executor(None, extract_page_range, pdf_bytes, 0, page_count)
+        return "".join(pages)
+
+    pool = get_pdf_pool()
+    futures = [loop.run_in_executor(pool, extract_page_range, pdf_bytes, start, stop)
+               for start, stop in _pdf_page_chunks(page_count)]
+    chunks = await asyncio.gather(*futures)
+    return "".join(page for chunk in chunks for page in chunk)
+
+def _extract_request_input(content: str, document_type: str, image_url: str):
+    """Build the Responses API input for license/SSN number extraction"""
 
     if document_type == "text":
-        try:
-            # OpenAI API call (uncomment and configure when ready)
-            prompt = f'''You are an expert character recognition system. You will receive a Driving License/ Social Security Number as text.
-                        Your job is to only extract the License or Social Secrity number from it. You will only return the number as output. There should be no spaces, dashes, or commas in the output.
-
-                        Here is the PDF content: {content}
-                        
-                        '''
-
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=prompt
-            )
-            
-            return response.output_text
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
-        
+        content = budget_content(content, "extract")
+        prompt = f'''You are an expert character recognition system. You will receive a Driving License/ Social Security Number as text.
+                    Your job is to only extract the License or Social Secrity number from it. You will only return the number as output. There should be no spaces, dashes, or commas in the output.
+
+                    Here is the PDF content: {content}
+                    
+                    '''
+        return prompt
+
     elif document_type == 'image':
-        try:            
-            # OpenAI API call (uncomment and configure when ready)
-            prompt = f'''You are an expert OCR system. You will receive a Driving License/ Social Security Number details as an image.
-                        Your job is to only extract the License or Social Secrity number from it. You will only return the number as output. There should be no spaces, dashes, or commas in the output.
-
-                        Here is the image:'''
-            
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "input_text", "text": prompt},
-                        {
-                            "type": "input_image",
-                            "image_url": image_url,
-                        },
-                    ],
-                }],
-            )
-            return response.output_text
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
+        prompt = f'''You are an expert OCR system. You will receive a Driving License/ Social Security Number details as an image.
+                    Your job is to only extract the License or Social Secrity number from it. You will only return the number as output. There should be no spaces, dashes, or commas in the output.
+
+                    Here is the image:'''
+        return [{
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {
+                    "type": "input_image",
+                    "image_url": image_url,
+                },
+            ],
+        }]
+
+def extract_document_with_llm(content: str, document_type: str, image_url: str) -> str:
+    """Extract license/SSN number using LLM (OpenAI)"""
+
+    if document_type not in ("text", "image"):
+        return None
+
+    try:
+        response = client.responses.create(
+            model=llm_model,
+            input=_extract_request_input(content, document_type, image_url)
+        )
+        return response.output_text
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
+
+async def extract_document_with_llm_async(content: str, document_type: str, image_url: str) -> str:
+    """Extract license/SSN number using the async LLM client without blocking the event loop"""
+
+    if document_type not in ("text", "image"):
+        return None
+
+    try:
+        # Trimming long PDF text is CPU work; do it off the event loop and before taking an LLM slot
+        request_input = await run_in_threadpool(_extract_request_input, content, document_type, image_url)
+        with track_stage("llm_extract"):
+            async with llm_semaphore:
+                response = await async_client.responses.create(
+                    model=llm_model,
+                    input=request_input
+                )
+        return response.output_text
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
         
 def save_file(file: UploadFile) -> str:
     """Save uploaded file locally"""
@@ -100,57 +200,163 @@ def save_file(file: UploadFile) -> str:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     
-def verify_document(document_type, type, content, image_url):
-    
+def _verify_request_input(document_type, type, content, image_url):
+    """Build the Responses API input for document type verification"""
+
     if type == 'image':
-        try:      
-            # OpenAI API call (uncomment and configure when ready)
-            prompt = f'''  
-                        You are an expert OCR system in identifying the document type: {document_type}. You will receive a document as an image.
-                        Your job is to verify whether the uploaded document is of the document type or is related to the document type:: {document_type}. 
-                        Be very thorough, strict and specific with the analysis.
-                        If it is, return only the Boolean 'True' as output
-                        If it is not, return only the Boolean 'False' as output 
-                        
-                        Here is the image:'''
-            
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "input_text", "text": prompt},
-                        {
-                            "type": "input_image",
-                            "image_url": image_url,
-                        },
-                    ],
-                }],
-            )
-            return response.output_text
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
-        
+        prompt = f'''  
+                    You are an expert OCR system in identifying the document type: {document_type}. You will receive a document as an image.
+                    Your job is to verify whether the uploaded document is of the document type or is related to the document type:: {document_type}. 
+                    Be very thorough, strict and specific with the analysis.
+                    If it is, return only the Boolean 'True' as output
+                    If it is not, return only the Boolean 'False' as output 
+                    
+                    Here is the image:'''
+        return [{
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {
+                    "type": "input_image",
+                    "image_url": image_url,
+                },
+            ],
+        }]
+
     elif type == "text":
-        try:
-            # OpenAI API call (uncomment and configure when ready)
-            prompt = f'''You are an expert OCR system in identifying the document type: {document_type}. You will receive a document.
-                        Your job is to verify whether the uploaded document is of the document type: {document_type}. 
-                        Only appliction belonging to the {document_type} must be accepted.
-                        Be very thorough, strict and specific with the analysis. Check for important stuff that are supposed to be present in the given document to qualify as {document_type}.
-                        Strictly do not confuse between the bank application and bank statement. Always read the title of the document to decide.
-                        If it is, return only the Boolean 'True' as output
-                        If it is not, return only the Boolean 'False' as output 
-
-                        Here is the PDF content: {content}
-                        
-                        '''
-
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=prompt
-            )
+        content = budget_content(content, "verify")
+        prompt = f'''You are an expert OCR system in identifying the document type: {document_type}. You will receive a document.
+                    Your job is to verify whether the uploaded document is of the document type: {document_type}. 
+                    Only appliction belonging to the {document_type} must be accepted.
+                    Be very thorough, strict and specific with the analysis. Check for important stuff that are supposed to be present in the given document to qualify as {document_type}.
+                    Strictly do not confuse between the bank application and bank statement. Always read the title of the document to decide.
+                    If it is, return only the Boolean 'True' as output
+                    If it is not, return only the Boolean 'False' as output 
+
+                    Here is the PDF content: {content}
+                    
+                    '''
+        return prompt
+
+def llm_cache_scope() -> str:
+    """Model, verify mode and prompt version that a cached LLM result is only valid for"""
+    return f"{llm_model}:{llm_verify_mode}:v{LLM_PROMPT_VERSION}"
+
+def verify_document(document_type, type, content, image_url):
+
+    if type not in ('image', 'text'):
+        return None
+
+    try:
+        response = client.responses.create(
+            model=llm_model,
+            input=_verify_request_input(document_type, type, content, image_url)
+        )
+        if type == 'text':
             print(f'The Decision: {response.output_text}')
-            return response.output_text
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
\ No newline at end of file
+        return response.output_text
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
+
+async def verify_document_async(document_type, type, content, image_url):
+    """Verify the document type using the async LLM client without blocking the event loop"""
+
+    if type not in ('image', 'text'):
+        return None
+
+    try:
+        request_input = await run_in_threadpool(_verify_request_input, document_type, type, content, image_url)
+        with track_stage("llm_verify"):
+            async with llm_semaphore:
+                response = await async_client.responses.create(
+                    model=llm_model,
+                    input=request_input
+                )
+        if type == 'text':
+            print(f'The Decision: {response.output_text}')
+        return response.output_text
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
+
+
+def _fused_request_input(document_type, type, content, image_url):
+    """Build the Responses API input for a single verify-and-extract call"""
+
+    # Render the plain value so the type the model echoes back compares equal in parse_fused_result
+    document_type = getattr(document_type, 'value', document_type)
+    instructions = f'''You are an expert OCR system in identifying the document type: {document_type} and extracting its number.
+                    First verify whether the uploaded document is of the document type: {document_type}.
+                    Be very thorough, strict and specific with the analysis.
+                    If it is, extract the License or Social Secrity number from it. There should be no spaces, dashes, or commas in the number.
+                    Respond only with a JSON object of the form:
+                    {{"is_valid": true or false, "document_type": "{document_type}", "extracted_number": "<number or empty string>"}}
+                    '''
+
+    if type == 'image':
+        return [{
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": instructions + "\n\nHere is the image:"},
+                {
+                    "type": "input_image",
+                    "image_url": image_url,
+                },
+            ],
+        }]
+
+    elif type == "text":
+        return instructions + f"\n\nHere is the PDF content: {budget_content(content, 'verify_extract')}"
+
+def parse_fused_result(raw: str, document_type) -> FusedVerificationResult:
+    """Parse and validate the structured output of the fused verify-and-extract call"""
+
+    expected_type = getattr(document_type, 'value', document_type)
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, flags=re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+
+    try:
+        result = FusedVerificationResult.model_validate(json.loads(text))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=f"Invalid structured LLM response: {str(e)}")
+
+    result.extracted_number = re.sub(r"[\s,\-]", "", result.extracted_number)
+
+    # A document identified as some other type, or one whose number could not be read, is not accepted
+    if result.document_type != expected_type or not result.extracted_number:
+        result.is_valid = False
+    if not result.is_valid:
+        result.extracted_number = ""
+    result.document_type = expected_type
+    return result
+
+async def verify_and_extract_document_async(document_type, type, content, image_url) -> FusedVerificationResult:
+    """Verify a personal document and extract its number, in one LLM call unless LLM_VERIFY_MODE is 'two_step'"""
+
+    if llm_verify_mode == 'two_step':
+        verified = await verify_document_async(document_type, type, content, image_url)
+        if str(verified).strip() != 'True':
+            return FusedVerificationResult(is_valid=False, document_type=getattr(document_type, 'value', document_type))
+        extracted_number = await extract_document_with_llm_async(content, type, image_url)
+        return FusedVerificationResult(is_valid=True,
+                                       document_type=getattr(document_type, 'value', document_type),
+                                       extracted_number=extracted_number)
+
+    if type not in ('image', 'text'):
+        return None
+
+    try:
+        request_input = await run_in_threadpool(_fused_request_input, document_type, type, content, image_url)
+        with track_stage("llm_verify_extract"):
+            async with llm_semaphore:
+                response = await async_client.responses.create(
+                    model=llm_model,
+                    input=request_input,
+                    text={"format": {"type": "json_object"}}
+                )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting number: {str(e)}")
+
+    print(f'The Decision: {response.output_text}')
+    return parse_fused_result(response.output_text, document_type)